@@ -0,0 +1,92 @@
+"""Compare page query latency with Tortoise's SQLite defaults and sqlite_pragmas.
+
+A writer keeps editing bulbs in transactions while the rooms and bulbs page
+queries run, like a client saving a form while others load pages.
+
+Run from the repository root: python -m benchmarks.sqlite_profile
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from src.models.bulb import Bulb
+from src.models.room import Room
+from src.settings import SETTINGS
+
+MODULES = {"models": ["src.models.bulb", "src.models.room", "src.models.icon"]}
+ROOMS = 10
+BULBS_PER_ROOM = 10
+READS = 500
+
+
+async def seed() -> None:
+    for room_number in range(ROOMS):
+        room = await Room.create(name=f"Room {room_number}")
+        for bulb_number in range(BULBS_PER_ROOM):
+            await Bulb.create(
+                name=f"Bulb {bulb_number}",
+                ip=f"10.0.{room_number}.{bulb_number + 1}",
+                room=room,
+            )
+
+
+async def keep_writing(stop: asyncio.Event) -> int:
+    writes = 0
+    while not stop.is_set():
+        async with in_transaction():
+            await Bulb.filter(id=writes % (ROOMS * BULBS_PER_ROOM) + 1).update(
+                name=f"Bulb {writes}"
+            )
+        writes += 1
+        await asyncio.sleep(0)
+    return writes
+
+
+async def measure(db_url: str) -> tuple[list[float], int]:
+    await Tortoise.init(db_url=db_url, modules=MODULES)
+    await Tortoise.generate_schemas()
+    await seed()
+
+    stop = asyncio.Event()
+    writer = asyncio.create_task(keep_writing(stop))
+    latencies = []
+    for _ in range(READS):
+        started_at = time.perf_counter()
+        await Room.all().prefetch_related("bulbs")
+        await Bulb.all().prefetch_related("room")
+        latencies.append(time.perf_counter() - started_at)
+    stop.set()
+    writes = await writer
+
+    await Tortoise.close_connections()
+    return latencies, writes
+
+
+async def main() -> None:
+    profiles = {
+        "default": {},
+        "pragmas": SETTINGS.sqlite_pragmas,
+    }
+    for name, pragmas in profiles.items():
+        with tempfile.TemporaryDirectory() as directory:
+            db_url = f"sqlite://{Path(directory) / 'db.sql'}"
+            if pragmas:
+                db_url = f"{db_url}?{urlencode(pragmas)}"
+            latencies, writes = await measure(db_url)
+
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(
+            f"{name:>10}: mean {statistics.mean(latencies) * 1e3:.2f} ms, "
+            f"p95 {p95 * 1e3:.2f} ms, {writes} concurrent writes"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+"""Compare the fast getPilot parser with the stdlib json based one.
+
+Run from the repository root: python -m benchmarks.wiz_parser
+"""
+
+import json
+import timeit
+
+from src.wiz import WizGetResult, json_loads, parse_get_result
+
+# getPilot replies recorded from WiZ bulbs in RGB, white and scene modes
+RECORDED_GET_PILOT_RESPONSES = [
+    b'{"method":"getPilot","env":"pro","result":{"mac":"a8bb5006033d","rssi":-56,'
+    b'"src":"","state":true,"sceneId":0,"r":255,"g":0,"b":0,"c":0,"w":0,"dimming":100}}',
+    b'{"method":"getPilot","env":"pro","result":{"mac":"a8bb50d46a1c","rssi":-70,'
+    b'"src":"udp","state":true,"sceneId":0,"temp":2700,"dimming":60}}',
+    b'{"method":"getPilot","env":"pro","result":{"mac":"6c2990c6d1e7","rssi":-62,'
+    b'"src":"","state":false,"sceneId":11,"speed":100,"dimming":10,"schdPsetId":5}}',
+]
+
+
+def parse_stdlib() -> None:
+    for response in RECORDED_GET_PILOT_RESPONSES:
+        WizGetResult(**json.loads(response)["result"])
+
+
+def parse_fast() -> None:
+    for response in RECORDED_GET_PILOT_RESPONSES:
+        parse_get_result(json_loads(response)["result"])
+
+
+if __name__ == "__main__":
+    number = 20_000
+    for name, func in [("stdlib", parse_stdlib), ("fast", parse_fast)]:
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        per_reply = seconds / (number * len(RECORDED_GET_PILOT_RESPONSES))
+        print(f"{name:>10}: {per_reply * 1e6:.2f} µs per reply")
@@ -0,0 +1,144 @@
+"""Vendor, fingerprint and precompress the frontend assets into /public.
+
+Compiles Tailwind with tailwind.config.js, downloads the scripts and styles
+BasePage otherwise loads from CDNs, the Google Fonts stylesheets with their
+font files, and writes public/manifest.json, which maps every asset to its
+fingerprinted file. Brotli copies need the Brotli package, without it only
+gzip ones are written.
+
+Run from the repository root: python build_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import re
+import subprocess
+import tempfile
+import urllib.request
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from src.assets import (
+    CDN_URLS,
+    FONTS_CSS,
+    FONTS_CSS_URLS,
+    MANIFEST_PATH,
+    PUBLIC_DIR,
+    TAILWIND_CSS,
+)
+
+TAILWIND_INPUT = "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n"
+# Smaller files are served as they are, compressing them saves next to nothing
+MIN_COMPRESS_SIZE = 1024
+COMPRESSED_SUFFIXES = (".gz", ".br")
+# woff2 is compressed already
+INCOMPRESSIBLE_SUFFIXES = (".woff2",)
+# Google Fonts only links woff2 files for browsers it knows to support them
+FONTS_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/126.0.0.0 Safari/537.36"
+)
+FONT_URL = re.compile(r"url\((https://[^)]+)\)")
+
+
+def compile_tailwind() -> bytes:
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = Path(directory) / "input.css"
+        output_path = Path(directory) / "output.css"
+        input_path.write_text(TAILWIND_INPUT)
+        subprocess.run(
+            [
+                "npx",
+                "--yes",
+                "tailwindcss@3",
+                "--config",
+                "tailwind.config.js",
+                "--input",
+                str(input_path),
+                "--output",
+                str(output_path),
+                "--minify",
+            ],
+            check=True,
+        )
+        return output_path.read_bytes()
+
+
+def download(url: str, headers: Optional[dict[str, str]] = None) -> bytes:
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def rewrite_font_urls(css: str, filenames: dict[str, str]) -> str:
+    # Relative to the stylesheet, which is served from /public as well
+    return FONT_URL.sub(lambda match: f"url({filenames[match.group(1)]})", css)
+
+
+def vendor_fonts() -> dict[str, str]:
+    """Write the font files and a stylesheet pointing to them, return their names."""
+    css = "\n".join(
+        download(url, headers={"User-Agent": FONTS_USER_AGENT}).decode()
+        for url in FONTS_CSS_URLS
+    )
+    fonts = {}
+    filenames = {}
+    for url in dict.fromkeys(FONT_URL.findall(css)):
+        name = f"fonts/{Path(urlsplit(url).path).name}"
+        fonts[name] = filenames[url] = write_asset(name, download(url))
+    fonts[FONTS_CSS] = write_asset(
+        FONTS_CSS, rewrite_font_urls(css, filenames).encode()
+    )
+    return fonts
+
+
+def write_asset(name: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    filename = f"{Path(name).stem}.{digest}{Path(name).suffix}"
+    path = PUBLIC_DIR / filename
+    path.write_bytes(content)
+
+    if (
+        len(content) >= MIN_COMPRESS_SIZE
+        and Path(name).suffix not in INCOMPRESSIBLE_SUFFIXES
+    ):
+        path.with_name(f"{filename}.gz").write_bytes(
+            gzip.compress(content, compresslevel=9, mtime=0)
+        )
+        if brotli is not None:
+            path.with_name(f"{filename}.br").write_bytes(
+                brotli.compress(content, quality=11)
+            )
+    return filename
+
+
+def remove_stale(previous: dict[str, str], current: dict[str, str]) -> None:
+    for filename in set(previous.values()) - set(current.values()):
+        for suffix in ("", *COMPRESSED_SUFFIXES):
+            (PUBLIC_DIR / f"{filename}{suffix}").unlink(missing_ok=True)
+
+
+def main() -> None:
+    PUBLIC_DIR.mkdir(exist_ok=True)
+    previous = json.loads(MANIFEST_PATH.read_text()) if MANIFEST_PATH.exists() else {}
+
+    manifest = {TAILWIND_CSS: write_asset(TAILWIND_CSS, compile_tailwind())}
+    for name, url in CDN_URLS.items():
+        manifest[name] = write_asset(name, download(url))
+        print(f"{name:>24}: {manifest[name]}")
+    manifest.update(vendor_fonts())
+    print(f"{FONTS_CSS:>24}: {manifest[FONTS_CSS]}")
+
+    remove_stale(previous, manifest)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,20 @@ from sanic.worker.loader import AppLoader
 from tortoise.contrib.sanic import register_tortoise
 
 import src.logger  # noqa
+from src.middleware import attach_middleware
+from src.poller import BULB_POLLER
+from src.registry import REGISTRY
 from src.settings import SETTINGS
 from src.views.bulbs.bulbs import create_view as create_bulbs_view
 from src.views.bulbs.id.bulb import create_view as create_bulbs_id_view
+from src.views.commands.commands import create_view as create_commands_view
+from src.views.events.events import create_view as create_events_view
 from src.views.home.home import create_view as create_home_view
 from src.views.more.more import create_view as create_more_view
+from src.views.public.public import create_view as create_public_view
 from src.views.rooms.id.room import create_view as create_rooms_id_view
 from src.views.rooms.rooms import create_view as create_rooms_view
+from src.wiz import close_wiz_protocol
 
 
 def attach_endpoints(app: Sanic):
@@ -22,10 +29,12 @@ def attach_endpoints(app: Sanic):
     create_bulbs_view(app)
     create_bulbs_id_view(app)
     create_more_view(app)
+    create_events_view(app)
+    create_commands_view(app)
 
 
 def serve_static_files(app: Sanic):
-    app.static("/public", "./public", name="public", directory_view=True)
+    create_public_view(app)
     app.static("/assets", "./assets", name="assets", directory_view=True)
 
 
@@ -40,6 +49,23 @@ def apply_static_redirects(app: Sanic):
         app.route(src_)(handler)
 
 
+def attach_listeners(app: Sanic):
+    @app.after_server_start
+    async def load_registry(_app: Sanic):
+        await REGISTRY.load()
+
+    @app.after_server_start
+    async def start_bulb_poller(_app: Sanic):
+        if SETTINGS.bulb_poller_enabled:
+            app.add_task(BULB_POLLER.run(), name="bulb_poller")
+
+    @app.before_server_stop
+    async def close_wiz_socket(_app: Sanic):
+        if SETTINGS.bulb_poller_enabled:
+            await app.cancel_task("bulb_poller", raise_exception=False)
+        close_wiz_protocol()
+
+
 def create_app() -> Sanic:
     app = Sanic("smart-home")
     app.config.TEMPLATING_ENABLE_ASYNC = True
@@ -47,10 +73,12 @@ def create_app() -> Sanic:
     attach_endpoints(app)
     serve_static_files(app)
     apply_static_redirects(app)
+    attach_listeners(app)
+    attach_middleware(app)
 
     register_tortoise(
         app,
-        db_url=str(SETTINGS.db_url),
+        db_url=SETTINGS.get_db_url(),
         modules={
             "models": [
                 "src.models.bulb",
@@ -1 +1,3 @@
+# Falls back to the CDN assets when the build fails, e.g. without internet
+python3.11 build_assets.py
 ENV=production PYTHONUNBUFFERED=1 npx pm2 start main.py --name smart-home-web-app --interpreter=/usr/local/bin/python3.11
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+from typing import Optional
+
+PUBLIC_DIR = Path("public")
+MANIFEST_PATH = PUBLIC_DIR / "manifest.json"
+
+# Vendored by build_assets.py, pages fall back to the CDN until it has run
+CDN_URLS = {
+    "material-tailwind.css": "https://unpkg.com/@material-tailwind/html@latest/styles/material-tailwind.css",
+    "ripple.js": "https://unpkg.com/@material-tailwind/html@2.2.2/scripts/ripple.js",
+    "collapse.js": "https://unpkg.com/@material-tailwind/html@2.2.2/scripts/collapse.js",
+    "sweetalert2.js": "https://cdn.jsdelivr.net/npm/sweetalert2@11",
+    "alpine.js": "https://unpkg.com/alpinejs@3.14.0",
+    "htmx.js": "https://unpkg.com/htmx.org@2.0.0",
+    "head-support.js": "https://unpkg.com/htmx-ext-head-support@2.0.0/head-support.js",
+    "sse.js": "https://unpkg.com/htmx-ext-sse@2.0.0/sse.js",
+}
+# Compiled from tailwind.config.js, no CDN equivalent
+TAILWIND_CSS = "tailwind.css"
+# The Google Fonts stylesheets, vendored together with their font files
+FONTS_CSS = "fonts.css"
+FONTS_CSS_URLS = (
+    "https://fonts.googleapis.com/icon?family=Material+Icons+Round",
+    "https://fonts.googleapis.com/icon?family=Material+Symbols+Rounded",
+    "https://fonts.googleapis.com/css2?family=Montserrat:ital,wght@0,100..900;1,100..900&display=swap",
+)
+
+
+class AssetManifest:
+    """Asset names to the fingerprinted files build_assets.py wrote to /public."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._assets: Optional[dict[str, str]] = None
+
+    @property
+    def assets(self) -> dict[str, str]:
+        if self._assets is None:
+            try:
+                self._assets = json.loads(self.path.read_text())
+            except FileNotFoundError:
+                self._assets = {}
+        return self._assets
+
+    def reload(self) -> None:
+        self._assets = None
+
+    def has(self, name: str) -> bool:
+        return name in self.assets
+
+    def url(self, name: str) -> str:
+        filename = self.assets.get(name)
+        if filename is None:
+            return CDN_URLS[name]
+        return f"/public/{filename}"
+
+    def is_fingerprinted(self, filename: str) -> bool:
+        return filename in self.assets.values()
+
+
+ASSETS = AssetManifest(MANIFEST_PATH)
@@ -0,0 +1,71 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src.settings import SETTINGS
+
+
+@dataclass
+class CircuitState:
+    failures: int = 0
+    cooldown: float = 0
+    # Earliest time an open circuit lets a probe through, None while closed
+    retry_at: Optional[float] = None
+
+
+class BulbHealth:
+    """Per-IP circuit breaker for bulbs that stopped answering.
+
+    After failure_threshold consecutive timeouts requests to the bulb fail
+    immediately. Once per cooldown one request is let through as a probe,
+    every failed probe doubles the cooldown up to max_cooldown.
+    """
+
+    def __init__(
+        self, failure_threshold: int, cooldown: float, max_cooldown: float
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._circuits: dict[str, CircuitState] = {}
+
+    def is_offline(self, ip: str) -> bool:
+        circuit = self._circuits.get(ip)
+        return circuit is not None and circuit.retry_at is not None
+
+    def allow_request(self, ip: str) -> bool:
+        circuit = self._circuits.get(ip)
+        if circuit is None or circuit.retry_at is None:
+            return True
+
+        now = time.monotonic()
+        if now < circuit.retry_at:
+            return False
+        # Half-open, concurrent requests wait for the next slot
+        circuit.retry_at = now + circuit.cooldown
+        return True
+
+    def record_success(self, ip: str) -> None:
+        self._circuits.pop(ip, None)
+
+    def record_failure(self, ip: str) -> None:
+        circuit = self._circuits.setdefault(ip, CircuitState())
+        circuit.failures += 1
+        if circuit.failures < self.failure_threshold:
+            return
+
+        if circuit.retry_at is None:
+            circuit.cooldown = self.cooldown
+        else:
+            circuit.cooldown = min(circuit.cooldown * 2, self.max_cooldown)
+        circuit.retry_at = time.monotonic() + circuit.cooldown
+
+    def reset(self) -> None:
+        self._circuits.clear()
+
+
+BULB_HEALTH = BulbHealth(
+    failure_threshold=SETTINGS.bulb_circuit_failure_threshold,
+    cooldown=SETTINGS.bulb_circuit_cooldown,
+    max_cooldown=SETTINGS.bulb_circuit_max_cooldown,
+)
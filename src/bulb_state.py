@@ -0,0 +1,112 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from src.settings import SETTINGS
+from src.wiz import BulbParameters, WizGetResult
+
+# Setting one light mode makes the bulb leave the others
+COLOR_FIELDS = ("r", "g", "b", "c", "w")
+# What the app can set, rssi and src differ from one reply to the next
+CONTROLLABLE_FIELDS = ("state", "dimming", "temp", "sceneId", "speed", *COLOR_FIELDS)
+
+StateListener = Callable[[str, Optional[WizGetResult]], None]
+
+
+@dataclass
+class BulbStateEntry:
+    # None when the bulb didn't respond
+    result: Optional[WizGetResult]
+    updated_at: float
+    expires_at: float
+
+
+class BulbStateStore:
+    """Last known getPilot result of every bulb, keyed by IP address."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[str, BulbStateEntry] = {}
+        self._listeners: list[StateListener] = []
+
+    def get_entry(self, ip: str) -> Optional[BulbStateEntry]:
+        entry = self._entries.get(ip)
+        if entry is None or entry.expires_at < time.monotonic():
+            return None
+        return entry
+
+    def get_last_known(self, ip: str) -> Optional[WizGetResult]:
+        """Last stored result, even if it has expired."""
+        entry = self._entries.get(ip)
+        return entry.result if entry else None
+
+    def get(self, ip: str) -> Optional[WizGetResult]:
+        entry = self.get_entry(ip)
+        return entry.result if entry else None
+
+    def set(
+        self, ip: str, result: Optional[WizGetResult], ttl: Optional[float] = None
+    ) -> None:
+        now = time.monotonic()
+        previous = self._entries.get(ip)
+        self._entries[ip] = BulbStateEntry(
+            result=result,
+            updated_at=now,
+            expires_at=now + (self.ttl if ttl is None else ttl),
+        )
+
+        if previous is None or state_changed(previous.result, result):
+            for listener in self._listeners:
+                listener(ip, result)
+
+    def merge(self, ip: str, params: BulbParameters) -> Optional[WizGetResult]:
+        """Apply sent parameters to the last known state, fresh or not."""
+        entry = self._entries.get(ip)
+        if entry is None or entry.result is None:
+            return None
+
+        result = merge_bulb_parameters(entry.result, params)
+        self.set(ip, result)
+        return result
+
+    def invalidate(self, ip: str) -> None:
+        self._entries.pop(ip, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def subscribe(self, listener: StateListener) -> Callable[[], None]:
+        """Call listener with (ip, result) whenever a bulb's state changes."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+
+def state_changed(
+    previous: Optional[WizGetResult], result: Optional[WizGetResult]
+) -> bool:
+    if previous is None or result is None:
+        return previous is not result
+    return any(
+        getattr(previous, name) != getattr(result, name) for name in CONTROLLABLE_FIELDS
+    )
+
+
+def merge_bulb_parameters(state: WizGetResult, params: BulbParameters) -> WizGetResult:
+    sent = {
+        name: value
+        for name, value in params.model_dump(exclude_none=True).items()
+        if name in WizGetResult.model_fields
+    }
+
+    cleared = {}
+    if any(name in sent for name in COLOR_FIELDS):
+        cleared = {"temp": None, "sceneId": 0}
+    elif "temp" in sent:
+        cleared = {**dict.fromkeys(COLOR_FIELDS), "sceneId": 0}
+    elif sent.get("sceneId"):
+        cleared = {**dict.fromkeys(COLOR_FIELDS), "temp": None}
+
+    return state.model_copy(update={**cleared, **sent})
+
+
+BULB_STATE = BulbStateStore(ttl=SETTINGS.bulb_state_ttl)
@@ -1,58 +1,82 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterable
 
 from dominate import document
 from dominate.tags import meta, link, style, script
-from dominate.util import raw
+from dominate.util import raw, text
+
+from src.assets import ASSETS, FONTS_CSS, FONTS_CSS_URLS, TAILWIND_CSS
+from src.middleware import StreamCompressor, get_encoding
 
 if TYPE_CHECKING:
     from dominate.tags import html_tag
+    from sanic import Request
+
+
+BODY_END = "</body>"
+STREAM_SLOT = "<!-- stream -->"
+
+
+class StreamSlot(text):
+    """Marks where BasePage.stream sends its fragments."""
+
+    def __init__(self) -> None:
+        super().__init__(STREAM_SLOT, escape=False)
 
 
 class BasePage(document):
     def __init__(self, *args: html_tag, title: str = "Smart Home") -> None:
         super().__init__(title=title)
+        self.add(*args)
 
-        with self.head:
-            meta(charset="utf-8")
-            meta(name="viewport", content="width=device-width, initial-scale=1.0")
-            link(
-                rel="icon",
-                href="/assets/bolt.svg",
-                type="image/svg",
-            )
-            self.add_scripts()
-            self.add_stylesheets()
-
-        self.body["hx-boost"] = "true"
-        self.body["hx-ext"] = "head-support"
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        # Only the body's content is built per request, the rest is shared
+        start, end = render_shell(self.title)
+        sb.append(start)
+        self.body._render_children(sb, indent_level + 2, indent_str, pretty, xhtml)
+        sb.append(end)
+        return sb
+
+    def render_body(self, pretty: bool = True) -> str:
+        sb = []
+        self.body._render_children(sb, 2, "  ", pretty, False)
+        return "".join(sb)
+
+    async def stream(self, request: Request, fragments: AsyncIterable[str]) -> None:
+        """Send the page as it is produced, fragments fill the StreamSlot.
+
+        The shell goes out before anything is awaited, so the browser fetches
+        scripts and styles while the fragments are still being produced.
+        """
+        start, end = render_shell(self.title)
+        compressor = StreamCompressor(get_encoding(request))
+        response = await request.respond(
+            content_type="text/html; charset=utf-8", headers=compressor.headers
+        )
+        await response.send(compressor.compress(start))
 
-        self.add(*args)
+        before, after = self.render_body().split(STREAM_SLOT, 1)
+        await response.send(compressor.compress(before))
+        async for fragment in fragments:
+            await response.send(compressor.compress(fragment))
+        await response.send(compressor.compress(after + end) + compressor.finish())
+        await response.eof()
 
     @staticmethod
     def add_stylesheets() -> None:
         # Material Tailwind
-        link(
-            href="https://unpkg.com/@material-tailwind/html@latest/styles/material-tailwind.css",
-            rel="stylesheet",
-        )
-
-        # Material Icons
-        link(
-            href="https://fonts.googleapis.com/icon?family=Material+Icons+Round",
-            rel="stylesheet",
-        )
-        link(
-            href="https://fonts.googleapis.com/icon?family=Material+Symbols+Rounded",
-            rel="stylesheet",
-        )
+        if ASSETS.has(TAILWIND_CSS):
+            link(href=ASSETS.url(TAILWIND_CSS), rel="stylesheet")
+        link(href=ASSETS.url("material-tailwind.css"), rel="stylesheet")
 
-        # Web Font
-        link(
-            href="https://fonts.googleapis.com/css2?family=Montserrat:ital,wght@0,100..900;1,100..900&display=swap",
-            rel="stylesheet",
-        )
+        # Material Icons and the Montserrat web font
+        if ASSETS.has(FONTS_CSS):
+            link(href=ASSETS.url(FONTS_CSS), rel="stylesheet")
+        else:
+            for url in FONTS_CSS_URLS:
+                link(href=url, rel="stylesheet")
 
         # HTMX
         style(
@@ -119,47 +143,74 @@ class BasePage(document):
 
     @staticmethod
     def add_scripts() -> None:
-        # Material Tailwind
-        script(src="https://cdn.tailwindcss.com")
-        script(
-            raw("""
-                tailwind.config = { 
-                  theme: {
-                    fontFamily: { 
-                      sans: ['Montserrat'],
-                      serif: ['Montserrat'],
-                      mono: ['Montserrat'],
-                      display: ['Montserrat'],
-                      body: ['Montserrat']
-                    } 
-                  }
-                }
-                """),
-            type="text/javascript",
-        )
+        # Material Tailwind, compiled by build_assets.py or by the runtime JIT
+        if not ASSETS.has(TAILWIND_CSS):
+            script(src="https://cdn.tailwindcss.com")
+            script(
+                raw("""
+                    tailwind.config = { 
+                      theme: {
+                        fontFamily: { 
+                          sans: ['Montserrat'],
+                          serif: ['Montserrat'],
+                          mono: ['Montserrat'],
+                          display: ['Montserrat'],
+                          body: ['Montserrat']
+                        } 
+                      }
+                    }
+                    """),
+                type="text/javascript",
+            )
         script(
-            src="https://unpkg.com/@material-tailwind/html@2.2.2/scripts/ripple.js",
+            src=ASSETS.url("ripple.js"),
             defer=True,
             **{"hx-head": "re-eval"},
         )
         script(
-            src="https://unpkg.com/@material-tailwind/html@2.2.2/scripts/collapse.js",
+            src=ASSETS.url("collapse.js"),
             defer=True,
             **{"hx-head": "re-eval"},
         )
 
         # sweetalert2
         script(
-            src="https://cdn.jsdelivr.net/npm/sweetalert2@11",
+            src=ASSETS.url("sweetalert2.js"),
             defer=True,
             **{"hx-head": "re-eval"},
         )
 
         # AlpineJS
-        script(src="https://unpkg.com/alpinejs@3.14.0")
+        script(src=ASSETS.url("alpine.js"))
 
         # HTMX
-        script(src="https://unpkg.com/htmx.org@2.0.0")
-        script(src="https://unpkg.com/htmx-ext-head-support@2.0.0/head-support.js")
+        script(src=ASSETS.url("htmx.js"))
+        script(src=ASSETS.url("head-support.js"))
+        script(src=ASSETS.url("sse.js"))
 
         # TODO: use swup!
+
+
+@lru_cache(maxsize=32)
+def render_shell(title: str) -> tuple[str, str]:
+    """Doctype, head and body tags around the page content, built once per title."""
+    shell = document(title=title)
+
+    with shell.head:
+        meta(charset="utf-8")
+        meta(name="viewport", content="width=device-width, initial-scale=1.0")
+        link(
+            rel="icon",
+            href="/assets/bolt.svg",
+            type="image/svg",
+        )
+        BasePage.add_scripts()
+        BasePage.add_stylesheets()
+
+    shell.body["hx-boost"] = "true"
+    shell.body["hx-ext"] = "head-support"
+    shell.body.clear()
+
+    html = shell.render()
+    body_end = html.rindex(BODY_END)
+    return html[:body_end], html[body_end:]
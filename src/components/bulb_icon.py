@@ -3,6 +3,7 @@ from typing import Optional
 from dominate.tags import button, p, div
 from sanic import Sanic
 
+from src.components.fragment_cache import FRAGMENT_CACHE
 from src.components.material_icons import Icon
 from src.components.spinner import Spinner
 from src.models.bulb import Bulb
@@ -13,9 +14,6 @@ class BulbIcon(button):
     tagname = "button"
     id = "app-bulb-icon"
     route = "bulb_with_state"
-    update_event = (
-        "load, change-room-state from:closest [event_container], turn-all-off from:body"
-    )
 
     def __init__(
         self, app: Sanic, bulb: Bulb = None, state: Optional[bool] = None
@@ -53,13 +51,28 @@ class BulbIcon(button):
             # )
 
     @classmethod
-    def lazy_load(cls, app: Sanic, bulb: Bulb) -> div:
+    def render_cached(cls, app: Sanic, bulb: Bulb) -> str:
+        # On, off or offline, the same three branches as __init__
+        if bulb.wiz_info and bulb.wiz_info.state:
+            state = True
+        else:
+            state = False if bulb.wiz_info else None
+        return FRAGMENT_CACHE.render(
+            cls.__name__, bulb.id, (bulb.name, state), lambda: cls(app, bulb)
+        )
+
+    @classmethod
+    def lazy_load(cls, bulb: Bulb) -> div:
         return div(
             Spinner(htmx_indicator=True),
+            id=cls.get_event_name(bulb),
             class_name="w-full",
             **{
-                "hx-get": app.url_for(cls.route, id=bulb.id),
-                "hx-trigger": cls.update_event,
                 "hx-swap": "innerHTML",
+                "sse-swap": cls.get_event_name(bulb),
             },
         )
+
+    @staticmethod
+    def get_event_name(bulb: Bulb) -> str:
+        return f"bulb-{bulb.id}"
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from dominate.tags import html_tag
+
+from src.settings import SETTINGS
+
+FragmentKey = tuple[str, int, Hashable]
+
+
+class FragmentCache:
+    """Rendered HTML of components keyed by (component, entity id, state).
+
+    The state holds everything a component reads from its bulb or room, so a
+    changed bulb state or database record is a new key and the old entry
+    ages out of the LRU.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[FragmentKey, str] = OrderedDict()
+
+    def render(
+        self,
+        component: str,
+        entity_id: int,
+        state: Hashable,
+        build: Callable[[], html_tag],
+    ) -> str:
+        key = (component, entity_id, state)
+        html = self._entries.get(key)
+        if html is not None:
+            self._entries.move_to_end(key)
+            return html
+
+        html = build().render(pretty=False)
+        self._entries[key] = html
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return html
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+FRAGMENT_CACHE = FragmentCache(maxsize=SETTINGS.fragment_cache_size)
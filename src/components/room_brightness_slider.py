@@ -2,6 +2,7 @@ from dominate.tags import button, div, label, span
 from dominate.util import raw
 from sanic import Sanic
 
+from src.components.fragment_cache import FRAGMENT_CACHE
 from src.components.spinner import Spinner
 from src.models.room import Room
 
@@ -29,20 +30,26 @@ class RoomBrightnessSlider(button):
                 self._brightness_slider_input()
 
     @classmethod
-    def lazy_load(cls, app: Sanic, room: Room) -> div:
+    def render_cached(cls, app: Sanic, room: Room) -> str:
+        return FRAGMENT_CACHE.render(
+            cls.__name__, room.id, room.bulbs_brightness, lambda: cls(app, room)
+        )
+
+    @classmethod
+    def lazy_load(cls, room: Room) -> div:
         return div(
             Spinner(htmx_indicator=True),
+            id=cls.get_event_name(room),
             class_name="w-full",
             **{
-                "hx-get": app.url_for(cls.route, id=room.id),
-                "hx-trigger": cls._get_update_event(room),
                 "hx-swap": "innerHTML",
+                "sse-swap": cls.get_event_name(room),
             },
         )
 
     @staticmethod
-    def _get_update_event(room: Room) -> str:
-        return f"load, change-bulb-state from:#room-{room.id}, change-room-state from:#room-{room.id}, turn-all-off from:body"
+    def get_event_name(room: Room) -> str:
+        return f"room-{room.id}-brightness"
 
     def _brightness_slider_input(self) -> raw:
         return raw(
@@ -57,6 +64,7 @@ class RoomBrightnessSlider(button):
                     max="100"
                     step="10"
                     hx-post="{self.app.url_for("room-brigthness", id=self.room.id)}"
+                    hx-sync="this:replace"
                 />
             """
             #     hx-post="{self.app.url_for("change_room_brightness", id=self.room.id)}"
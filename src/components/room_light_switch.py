@@ -1,6 +1,7 @@
 from dominate.tags import button, div, input_, label, span
 from sanic import Sanic
 
+from src.components.fragment_cache import FRAGMENT_CACHE
 from src.components.spinner import Spinner
 from src.models.room import Room
 
@@ -42,16 +43,22 @@ class RoomLightSwitch(button):
                 )
 
     @classmethod
-    def lazy_load(cls, app: Sanic, room: Room) -> div:
+    def render_cached(cls, app: Sanic, room: Room) -> str:
+        return FRAGMENT_CACHE.render(
+            cls.__name__, room.id, room.bulbs_state, lambda: cls(app, room)
+        )
+
+    @classmethod
+    def lazy_load(cls, room: Room) -> div:
         return div(
             Spinner(htmx_indicator=True),
+            id=cls.get_event_name(room),
             **{
-                "hx-get": app.url_for(cls.route, id=room.id),
-                "hx-trigger": cls._get_update_event(room),
                 "hx-swap": "innerHTML",
+                "sse-swap": cls.get_event_name(room),
             },
         )
 
     @staticmethod
-    def _get_update_event(room: Room) -> str:
-        return f"load, change-bulb-state from:#room-{room.id}, change-room-state from:#room-{room.id}, turn-all-off from:body"
+    def get_event_name(room: Room) -> str:
+        return f"room-{room.id}-state"
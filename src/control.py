@@ -1,45 +1,52 @@
 import asyncio
-from src.wiz import send_message_to_wiz, MESSAGES, WizMessage, BulbParameters
+from src.fanout import BRIGHTNESS_COMMANDS, FAN_OUT
+from src.settings import SETTINGS
+from src.wiz import (
+    send_message_to_wiz,
+    broadcast_message_to_wiz,
+    MESSAGES,
+    get_scene_message,
+)
 from src.models.bulb import Bulb
-from typing import Literal
+from src.registry import REGISTRY
+from typing import Awaitable, Callable, Literal
+
+
+async def fan_out(bulbs: list[Bulb], send: Callable[[Bulb], Awaitable[None]]) -> bool:
+    results = await FAN_OUT.run(bulbs, send)
+
+    return not any(isinstance(result, Exception) for result in results)
 
 
 async def toggle_state(bulb_ids: list[int], state: bool) -> bool:
     if not bulb_ids:
         return False
 
-    bulbs = await Bulb.filter(id__in=bulb_ids)
-    tasks = [bulb.toggle_state(state) for bulb in bulbs]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    return not any(isinstance(result, Exception) for result in results)
+    bulbs = await REGISTRY.get_bulbs(bulb_ids)
+    return await fan_out(bulbs, lambda bulb: bulb.toggle_state(state))
 
 
 async def change_brightness(bulb_ids: list[int], brightness: int) -> bool:
     if not bulb_ids:
         return False
 
-    bulbs = await Bulb.filter(id__in=bulb_ids)
-    tasks = [bulb.set_brightness(brightness) for bulb in bulbs]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    return not any(isinstance(result, Exception) for result in results)
+    bulbs = await REGISTRY.get_bulbs(bulb_ids)
+    # A dragged slider sends many steps, only the latest one per bulb matters
+    return await fan_out(
+        bulbs,
+        lambda bulb: BRIGHTNESS_COMMANDS.submit(
+            bulb.ip, lambda: bulb.set_brightness(brightness)
+        ),
+    )
 
 
 async def set_scene_id(bulb_ids: list[int], scene_id: int) -> bool:
     if not bulb_ids:
         return False
 
-    bulbs = await Bulb.filter(id__in=bulb_ids)
-    tasks = [
-        bulb.send_message(
-            WizMessage(params=BulbParameters(state=True, sceneId=scene_id))
-        )
-        for bulb in bulbs
-    ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    return not any(isinstance(result, Exception) for result in results)
+    bulbs = await REGISTRY.get_bulbs(bulb_ids)
+    message = get_scene_message(scene_id)
+    return await fan_out(bulbs, lambda bulb: bulb.send_message(message))
 
 
 async def set_temperature_by_name(
@@ -49,8 +56,25 @@ async def set_temperature_by_name(
     if not bulb_ids:
         return False
 
-    bulbs = await Bulb.filter(id__in=bulb_ids)
-    tasks = [bulb.send_message(MESSAGES[temperature.upper()]) for bulb in bulbs]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    bulbs = await REGISTRY.get_bulbs(bulb_ids)
+    message = MESSAGES[temperature.upper()]
+    return await fan_out(bulbs, lambda bulb: bulb.send_message(message))
+
+
+async def turn_all_off() -> bool:
+    bulbs = await REGISTRY.get_bulbs()
+    message = MESSAGES["OFF"]
+
+    if not SETTINGS.wiz_broadcast_address:
+        return await fan_out(bulbs, lambda bulb: bulb.send_message(message))
+
+    # One datagram for the whole house, unicast only to bulbs that missed it
+    responses = await broadcast_message_to_wiz(
+        [bulb.ip for bulb in bulbs], message, SETTINGS.wiz_broadcast_address
+    )
+    results = await asyncio.gather(
+        *[bulb.apply_message_result(message, *responses[bulb.ip]) for bulb in bulbs],
+        return_exceptions=True,
+    )
 
     return not any(isinstance(result, Exception) for result in results)
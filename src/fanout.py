@@ -0,0 +1,191 @@
+import asyncio
+import ipaddress
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, Protocol, TypeVar
+
+from src.settings import SETTINGS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACCESS_POINT = "default"
+
+
+class HasIp(Protocol):
+    ip: str
+
+
+Target = TypeVar("Target", bound=HasIp)
+Command = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class AccessPointQueue:
+    semaphore: asyncio.Semaphore
+    # Loop time before which the next datagram through this AP must not start
+    next_send_at: float = 0
+
+
+@dataclass
+class FanOutStats:
+    commands: int = 0
+    failures: int = 0
+    elapsed: float = 0
+
+    @property
+    def commands_per_second(self) -> float:
+        return self.commands / self.elapsed if self.elapsed else 0
+
+
+@dataclass
+class FanOutScheduler:
+    """Sends one command to many bulbs without flooding the access points.
+
+    Bulbs are grouped by the access point their IP belongs to. Each group
+    has its own concurrency cap and spacing between sends, and all groups
+    together stay under max_concurrency.
+    """
+
+    max_concurrency: int
+    max_concurrency_per_access_point: int
+    packet_interval: float
+    # Access point name to the networks of the bulbs behind it
+    access_points: dict[str, list[str]] = field(default_factory=dict)
+    last_stats: Optional[FanOutStats] = None
+    total_stats: FanOutStats = field(default_factory=FanOutStats)
+
+    def __post_init__(self) -> None:
+        self._networks = [
+            (name, ipaddress.ip_network(network))
+            for name, networks in self.access_points.items()
+            for network in networks
+        ]
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queues: dict[str, AccessPointQueue] = {}
+
+    def get_access_point(self, ip: str) -> str:
+        address = ipaddress.ip_address(ip)
+        for name, network in self._networks:
+            if address in network:
+                return name
+        return DEFAULT_ACCESS_POINT
+
+    async def run(
+        self,
+        targets: list[Target],
+        send: Callable[[Target], Awaitable[Any]],
+    ) -> list[Any]:
+        """Call send for every target, returning its result or exception."""
+        event_loop = asyncio.get_running_loop()
+        started_at = event_loop.time()
+        results = await asyncio.gather(
+            *[self.call(target, send) for target in targets], return_exceptions=True
+        )
+
+        stats = FanOutStats(
+            commands=len(targets),
+            failures=sum(
+                result is False or isinstance(result, BaseException)
+                for result in results
+            ),
+            elapsed=event_loop.time() - started_at,
+        )
+        self._record(stats)
+        return results
+
+    async def call(
+        self, target: Target, send: Callable[[Target], Awaitable[Any]]
+    ) -> Any:
+        """Call send for one target within the same caps, e.g. for state reads.
+
+        Must not be nested inside another send, that one already holds a slot.
+        """
+        queue = self._get_queue(self.get_access_point(target.ip))
+        # The AP slot is taken first, waiting on a busy AP must not hold a
+        # global slot that other APs could use
+        async with queue.semaphore, self._get_semaphore():
+            event_loop = asyncio.get_running_loop()
+            now = event_loop.time()
+            send_at = max(now, queue.next_send_at)
+            queue.next_send_at = send_at + self.packet_interval
+            if send_at > now:
+                await asyncio.sleep(send_at - now)
+            return await send(target)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_queue(self, access_point: str) -> AccessPointQueue:
+        queue = self._queues.get(access_point)
+        if queue is None:
+            queue = AccessPointQueue(
+                semaphore=asyncio.Semaphore(self.max_concurrency_per_access_point)
+            )
+            self._queues[access_point] = queue
+        return queue
+
+    def _record(self, stats: FanOutStats) -> None:
+        self.last_stats = stats
+        self.total_stats.commands += stats.commands
+        self.total_stats.failures += stats.failures
+        self.total_stats.elapsed += stats.elapsed
+        logger.info(
+            "Sent %d commands in %.3fs (%.1f/s), %d failed",
+            stats.commands,
+            stats.elapsed,
+            stats.commands_per_second,
+            stats.failures,
+        )
+
+
+class LatestCommandQueue:
+    """Keeps at most one command in flight per key, the latest one wins.
+
+    A command submitted while another for the same key is in flight waits
+    for it to finish. If a newer one arrives in the meantime the waiting
+    command is dropped without being sent.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, tuple[Command, asyncio.Future]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+
+    async def submit(self, key: str, send: Command) -> bool:
+        """Send through the queue, False when a newer command replaced this one."""
+        superseded = self._pending.get(key)
+        if superseded is not None and not superseded[1].done():
+            superseded[1].set_result(False)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending[key] = (send, waiter)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._work(key))
+        return await waiter
+
+    async def _work(self, key: str) -> None:
+        try:
+            while key in self._pending:
+                send, waiter = self._pending.pop(key)
+                try:
+                    await send()
+                except Exception as e:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                else:
+                    if not waiter.done():
+                        waiter.set_result(True)
+        finally:
+            del self._workers[key]
+
+
+FAN_OUT = FanOutScheduler(
+    max_concurrency=SETTINGS.fanout_max_concurrency,
+    max_concurrency_per_access_point=SETTINGS.fanout_max_concurrency_per_access_point,
+    packet_interval=SETTINGS.fanout_packet_interval,
+    access_points=SETTINGS.access_points,
+)
+
+# Brightness slider steps, keyed by bulb IP
+BRIGHTNESS_COMMANDS = LatestCommandQueue()
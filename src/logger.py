@@ -1,5 +1,11 @@
+import atexit
 import logging
+import queue
+import random
 import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from src.settings import SETTINGS
 
 fmt = logging.Formatter(
     fmt="%(asctime)s - %(name)s:%(lineno)d - %(levelname)s - %(message)s",
@@ -9,7 +15,29 @@ sh = logging.StreamHandler(sys.stdout)
 sh.setLevel(logging.DEBUG)
 sh.setFormatter(fmt)
 
-# will print debug sql
-logger_db_client = logging.getLogger("tortoise.db_client")
-logger_db_client.setLevel(logging.DEBUG)
-logger_db_client.addHandler(sh)
+
+class DebugSamplingFilter(logging.Filter):
+    """Let through only a fraction of DEBUG records, e.g. SQL statements."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+# Handlers on the event loop only enqueue, writing to stdout happens on the
+# listener thread so a slow pipe never blocks a request
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = QueueHandler(log_queue)
+queue_handler.addFilter(DebugSamplingFilter(SETTINGS.log_debug_sample_rate))
+listener = QueueListener(log_queue, sh, respect_handler_level=True)
+
+for name, level in SETTINGS.log_levels.items():
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+
+listener.start()
+atexit.register(listener.stop)
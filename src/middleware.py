@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from sanic import HTTPResponse, Request, Sanic
+
+from src.settings import SETTINGS
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def accepted_encodings(request: Request) -> set[str]:
+    encodings = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        encoding, _, params = item.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0"):
+            encodings.add(encoding.strip())
+    return encodings
+
+
+def get_encoding(request: Request) -> Optional[str]:
+    """Content-Encoding to compress a response with, None to send it as is."""
+    encodings = accepted_encodings(request)
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=SETTINGS.brotli_compression_quality)
+    return gzip.compress(body, compresslevel=SETTINGS.gzip_compression_level, mtime=0)
+
+
+class StreamCompressor:
+    """Compresses a streamed response chunk by chunk.
+
+    Every chunk is flushed, so the browser can render it before the
+    response ends.
+    """
+
+    def __init__(self, encoding: Optional[str]) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(
+                quality=SETTINGS.brotli_compression_quality
+            )
+        elif encoding == "gzip":
+            # wbits 31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(
+                SETTINGS.gzip_compression_level, zlib.DEFLATED, 31
+            )
+
+    @property
+    def headers(self) -> dict[str, str]:
+        if self.encoding is None:
+            return {"Vary": "Accept-Encoding"}
+        return {"Content-Encoding": self.encoding, "Vary": "Accept-Encoding"}
+
+    def compress(self, data: str) -> bytes:
+        if self.encoding is None:
+            return data.encode()
+        if self.encoding == "br":
+            return self._compressor.process(data.encode()) + self._compressor.flush()
+        return self._compressor.compress(data.encode()) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        if self.encoding is None:
+            return b""
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def get_etag(body: bytes) -> str:
+    # Weak, the compressed representations share it
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def matches_etag(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def add_vary(response: HTTPResponse, header: str) -> None:
+    vary = response.headers.get("vary", "")
+    if header.lower() not in vary.lower():
+        response.headers["Vary"] = f"{vary}, {header}" if vary else header
+
+
+def is_compressible(response: HTTPResponse) -> bool:
+    return (
+        len(response.body) >= SETTINGS.compression_min_size
+        and "content-encoding" not in response.headers
+        and (response.content_type or "").startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def attach_middleware(app: Sanic) -> None:
+    @app.on_response
+    async def conditional_and_compressed_response(
+        request: Request, response: HTTPResponse
+    ):
+        # Streamed responses have sent nothing yet and handle encoding themselves
+        if not response.body:
+            return None
+
+        if request.method == "GET" and response.status == 200:
+            etag = response.headers.get("etag")
+            if etag is None:
+                etag = get_etag(response.body)
+                response.headers["ETag"] = etag
+                if "cache-control" not in response.headers:
+                    # Cached, but revalidated with If-None-Match on every use
+                    response.headers["Cache-Control"] = "no-cache"
+
+            if matches_etag(request, etag):
+                # Headers like HX-Trigger still apply to the cached body
+                return HTTPResponse(
+                    status=304,
+                    headers={
+                        name: value
+                        for name, value in response.headers.items()
+                        if not name.lower().startswith("content-")
+                    },
+                )
+
+        if is_compressible(response):
+            add_vary(response, "Accept-Encoding")
+            encoding = get_encoding(request)
+            if encoding is not None:
+                response.body = compress(response.body, encoding)
+                response.headers["Content-Encoding"] = encoding
+                response.headers.pop("content-length", None)
+        return None
@@ -1,4 +1,5 @@
-from typing import Optional
+import asyncio
+from typing import Optional, Union
 
 import wtforms
 from tortoise import fields
@@ -12,19 +13,30 @@ from tortoise.validators import validate_ipv4_address
 from wtforms import validators
 from wtforms.form import Form
 
+from src.bulb_state import BULB_STATE
+from src.fanout import FAN_OUT
 from src.forms.form_builder import build_form
 from src.forms.helpers import get_choices
-from src.models.helpers import GetItemMixin, TimestampMixin
+from src.models.helpers import (
+    GetItemMixin,
+    TimestampMixin,
+    describe_fields,
+)
 from src.models.icon import Icon
 from src.models.room import Room
+from src.settings import SETTINGS
 from src.wiz import (
     send_message_to_wiz,
+    get_brightness_message,
     MESSAGES,
     WizMessage,
-    BulbParameters,
     WizGetResult,
+    WizError,
+    WizSetResult,
 )
 
+_VERIFICATION_TASKS: set[asyncio.Task] = set()
+
 
 class Bulb(Model, TimestampMixin, GetItemMixin):
     ip = fields.CharField(
@@ -53,12 +65,9 @@ class Bulb(Model, TimestampMixin, GetItemMixin):
 
         return build_form(bulb_form, htmx_options)
 
-    # TODO: use mixin?
     @classmethod
     def get_bulb_fields(cls):
-        return dict(
-            map(lambda field: (field["name"], field), cls.describe()["data_fields"])
-        )
+        return describe_fields(cls)
 
     @classmethod
     def get_name_form_validators(cls):
@@ -97,30 +106,77 @@ class Bulb(Model, TimestampMixin, GetItemMixin):
         return ip_address_validators
 
     async def assign_wiz_info(self) -> None:
+        cached = BULB_STATE.get_entry(self.ip)
+        if cached is not None:
+            self.wiz_info = cached.result or {}
+            return
+
         error, result = await send_message_to_wiz(self.ip, MESSAGES["INFO"])
         self.wiz_info = {} if error else result
+        # Offline is cached too, the next render doesn't wait on the bulb again
+        BULB_STATE.set(self.ip, None if error else result)
 
-    async def toggle_state(self, state: bool) -> None:
-        error, res = await send_message_to_wiz(
-            self.ip, message=MESSAGES["ON"] if state else MESSAGES["OFF"]
-        )
-        await self.assign_wiz_info()
+    async def read_wiz_info(self) -> None:
+        """assign_wiz_info for reads outside of a command send.
+
+        Only a bulb that has to be asked waits for a fan-out slot, cached
+        states are memory lookups.
+        """
+        if BULB_STATE.get_entry(self.ip) is None:
+            await FAN_OUT.call(self, lambda bulb: bulb.assign_wiz_info())
+        else:
+            await self.assign_wiz_info()
+
+    def assign_last_known_wiz_info(self) -> None:
+        self.wiz_info = BULB_STATE.get_last_known(self.ip) or {}
+
+    async def toggle_state(self, state: bool) -> bool:
+        return await self.send_message(MESSAGES["ON"] if state else MESSAGES["OFF"])
 
     async def set_brightness(self, brightness: int) -> bool:
-        message = (
-            WizMessage(params=BulbParameters(state=True, brightness=brightness))
-            if brightness > 0
-            else MESSAGES["OFF"]
-        )
-        error, res = await send_message_to_wiz(
-            self.ip,
-            message,
-        )
-        await self.assign_wiz_info()
+        return await self.send_message(get_brightness_message(brightness))
 
-    async def send_message(self, message: WizMessage) -> None:
+    async def send_message(self, message: WizMessage) -> bool:
         error, res = await send_message_to_wiz(self.ip, message=message)
+        return await self.apply_message_result(message, error, res)
+
+    async def apply_message_result(
+        self,
+        message: WizMessage,
+        error: Optional[Union[str, WizError]],
+        res: Optional[WizSetResult],
+    ) -> bool:
+        """Update wiz_info and the state store after a setPilot was sent.
+
+        Returns whether the bulb acknowledged the message.
+        """
+        success = bool(not error and res and res.success)
+        if SETTINGS.bulb_write_through and success:
+            merged = BULB_STATE.merge(self.ip, message.params)
+            if merged is not None:
+                self.wiz_info = merged
+                self._verify_wiz_info_later()
+                return success
+
+        BULB_STATE.invalidate(self.ip)
         await self.assign_wiz_info()
+        return success
+
+    def _verify_wiz_info_later(self) -> None:
+        delay = SETTINGS.bulb_verify_write_delay
+        if delay is None:
+            return
+
+        async def verify() -> None:
+            await asyncio.sleep(delay)
+            error, result = await send_message_to_wiz(self.ip, MESSAGES["INFO"])
+            if not error:
+                BULB_STATE.set(self.ip, result)
+
+        task = asyncio.create_task(verify())
+        # Keep a reference, the event loop only holds weak ones
+        _VERIFICATION_TASKS.add(task)
+        task.add_done_callback(_VERIFICATION_TASKS.discard)
 
 
 class BulbForm(Form):
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import cache
 from typing import Callable, TYPE_CHECKING
 
 from tortoise.contrib.pydantic import pydantic_model_creator, pydantic_queryset_creator, PydanticListModel
@@ -19,6 +20,12 @@ def validate_int_in_range(min: int, max: int) -> Callable[[int], None]:
     return _validate_int_in_range
 
 
+@cache
+def describe_fields(model: type[Model]) -> dict[str, dict]:
+    """Data fields from describe() by name, the schema walk runs once per model."""
+    return {field["name"]: field for field in model.describe()["data_fields"]}
+
+
 class TimestampMixin:
     created_at = DatetimeField(null=True, auto_now_add=True)
     updated_at = DatetimeField(null=True, auto_now=True)
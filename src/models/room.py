@@ -12,8 +12,16 @@ from wtforms import validators
 from wtforms.form import Form
 
 from src.forms.form_builder import build_form
-from src.models.helpers import GetItemMixin, TimestampMixin, PydanticMixin
+from src.models.helpers import (
+    GetItemMixin,
+    TimestampMixin,
+    PydanticMixin,
+    describe_fields,
+)
 from src.models.icon import Icon
+from src.settings import SETTINGS
+
+_LATE_STATE_TASKS: set[asyncio.Task] = set()
 
 
 class Room(Model, TimestampMixin, GetItemMixin, PydanticMixin):
@@ -37,9 +45,7 @@ class Room(Model, TimestampMixin, GetItemMixin, PydanticMixin):
 
     @classmethod
     def get_room_fields(cls):
-        return dict(
-            map(lambda field: (field["name"], field), cls.describe()["data_fields"])
-        )
+        return describe_fields(cls)
 
     @classmethod
     def get_name_form_validators(cls):
@@ -59,9 +65,33 @@ class Room(Model, TimestampMixin, GetItemMixin, PydanticMixin):
 
         return name_validators
 
+    async def assign_bulbs_wiz_info(self) -> None:
+        """Fetch the state of the room's bulbs within the render budget.
+
+        Bulbs that don't answer in time get their last known state, their
+        late reply still lands in the state store and is pushed to the page.
+        """
+        tasks = {asyncio.create_task(bulb.read_wiz_info()): bulb for bulb in self.bulbs}
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(
+            tasks, timeout=SETTINGS.room_state_render_budget
+        )
+        for task in pending:
+            tasks[task].assign_last_known_wiz_info()
+            _LATE_STATE_TASKS.add(task)
+            task.add_done_callback(_LATE_STATE_TASKS.discard)
+
     async def assign_room_state(self) -> None:
-        await asyncio.gather(*[bulb.assign_wiz_info() for bulb in self.bulbs])
+        await self.assign_bulbs_wiz_info()
+        self.update_bulbs_state()
+
+    async def assign_room_brightness(self) -> None:
+        await self.assign_bulbs_wiz_info()
+        self.update_bulbs_brightness()
 
+    def update_bulbs_state(self) -> None:
         if not any(bulb.wiz_info for bulb in self.bulbs):
             self.bulbs_state = None
         else:
@@ -69,9 +99,7 @@ class Room(Model, TimestampMixin, GetItemMixin, PydanticMixin):
                 bulb.wiz_info and bulb.wiz_info.state for bulb in self.bulbs
             )
 
-    async def assign_room_brightness(self) -> None:
-        await asyncio.gather(*[bulb.assign_wiz_info() for bulb in self.bulbs])
-
+    def update_bulbs_brightness(self) -> None:
         if not any(bulb.wiz_info for bulb in self.bulbs):
             self.bulbs_brightness = None
         else:
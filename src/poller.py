@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from src.bulb_state import BULB_STATE, BulbStateStore, state_changed
+from src.fanout import FAN_OUT
+from src.registry import REGISTRY
+from src.settings import SETTINGS
+from src.wiz import MESSAGES, READ_RETRY_POLICY, WizGetResult, send_message_to_wiz
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PollSchedule:
+    ip: str
+    interval: float
+    next_poll_at: float
+
+
+class BulbPoller:
+    """Keeps the state store fresh so request handlers can read from memory.
+
+    Bulbs that changed recently are polled every min_interval, unchanged ones
+    back off up to max_interval and offline ones up to offline_max_interval.
+    """
+
+    def __init__(
+        self,
+        store: BulbStateStore,
+        min_interval: float,
+        max_interval: float,
+        offline_max_interval: float,
+        bulbs_refresh_interval: float,
+    ) -> None:
+        self.store = store
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.offline_max_interval = offline_max_interval
+        self.bulbs_refresh_interval = bulbs_refresh_interval
+        self._schedules: dict[str, PollSchedule] = {}
+        self._bulbs_refreshed_at: Optional[float] = None
+
+    async def run(self) -> None:
+        unsubscribe = self.store.subscribe(self._on_state_change)
+        try:
+            while True:
+                await self._refresh_bulbs()
+
+                now = self._now()
+                due = [
+                    schedule
+                    for schedule in self._schedules.values()
+                    if schedule.next_poll_at <= now
+                ]
+                # Every bulb is due at startup, keep to the fan-out caps
+                await asyncio.gather(
+                    *[
+                        FAN_OUT.call(schedule, lambda schedule: self._poll(schedule.ip))
+                        for schedule in due
+                    ]
+                )
+
+                await asyncio.sleep(self._sleep_time())
+        finally:
+            unsubscribe()
+
+    def touch(self, ip: str) -> None:
+        """Poll a bulb often again, e.g. after it has been commanded."""
+        schedule = self._schedules.get(ip)
+        if schedule is not None:
+            schedule.interval = self.min_interval
+            schedule.next_poll_at = self._now() + self.min_interval
+
+    async def _refresh_bulbs(self) -> None:
+        now = self._now()
+        if (
+            self._bulbs_refreshed_at is not None
+            and now - self._bulbs_refreshed_at < self.bulbs_refresh_interval
+        ):
+            return
+
+        try:
+            ips = {bulb.ip for bulb in await REGISTRY.get_bulbs()}
+        except Exception:
+            logger.exception("Could not load bulbs to poll")
+            return
+
+        self._bulbs_refreshed_at = now
+        for ip in ips - self._schedules.keys():
+            self._schedules[ip] = PollSchedule(
+                ip=ip, interval=self.min_interval, next_poll_at=now
+            )
+        for ip in self._schedules.keys() - ips:
+            del self._schedules[ip]
+
+    async def _poll(self, ip: str) -> None:
+        previous = self.store.get_entry(ip)
+        error, result = await send_message_to_wiz(ip, MESSAGES["INFO"])
+
+        schedule = self._schedules.get(ip)
+        if schedule is None:
+            return
+
+        if error:
+            result = None
+            interval = min(schedule.interval * 2, self.offline_max_interval)
+        elif previous is None or state_changed(previous.result, result):
+            interval = self.min_interval
+        else:
+            interval = min(schedule.interval * 2, self.max_interval)
+
+        # Keep the entry fresh until the next poll has had time to answer
+        self.store.set(ip, result, ttl=interval + READ_RETRY_POLICY.deadline)
+        schedule.interval = interval
+        schedule.next_poll_at = self._now() + interval
+
+    def _on_state_change(self, ip: str, _result: Optional[WizGetResult]) -> None:
+        self.touch(ip)
+
+    def _sleep_time(self) -> float:
+        if not self._schedules:
+            return self.min_interval
+        next_poll_at = min(
+            schedule.next_poll_at for schedule in self._schedules.values()
+        )
+        return min(max(next_poll_at - self._now(), 0.05), self.min_interval)
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+
+BULB_POLLER = BulbPoller(
+    BULB_STATE,
+    min_interval=SETTINGS.bulb_poll_min_interval,
+    max_interval=SETTINGS.bulb_poll_max_interval,
+    offline_max_interval=SETTINGS.bulb_poll_offline_max_interval,
+    bulbs_refresh_interval=SETTINGS.bulb_poll_refresh_bulbs_interval,
+)
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Iterable, Optional
+
+from tortoise.exceptions import DoesNotExist
+
+from src.models.bulb import Bulb
+from src.models.room import Room
+
+
+class Registry:
+    """Bulbs, rooms and room membership kept in memory.
+
+    Command handlers turn ids into bulbs here instead of querying SQLite. The
+    CRUD handlers invalidate it and the next lookup reloads everything. Every
+    Sanic worker holds its own copy.
+    """
+
+    def __init__(self) -> None:
+        self._bulbs: dict[int, Bulb] = {}
+        self._bulbs_by_ip: dict[str, Bulb] = {}
+        self._rooms: dict[int, Room] = {}
+        self._version = 0
+        self._loaded_version: Optional[int] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    def invalidate(self) -> None:
+        self._version += 1
+
+    async def load(self) -> None:
+        # A load that overlaps an invalidation is repeated by the next lookup
+        version = self._version
+        rooms = await Room.all().prefetch_related("bulbs")
+        bulbs = [bulb for room in rooms for bulb in room.bulbs]
+        bulbs.extend(await Bulb.filter(room_id=None))
+
+        self._rooms = {room.id: room for room in rooms}
+        self._bulbs = {bulb.id: bulb for bulb in bulbs}
+        self._bulbs_by_ip = {bulb.ip: bulb for bulb in bulbs}
+        self._loaded_version = version
+
+    async def get_bulb(self, id: int) -> Bulb:
+        await self._ensure_loaded()
+        try:
+            return self._bulbs[id]
+        except KeyError:
+            raise DoesNotExist(f"Bulb {id} does not exist")
+
+    async def get_bulbs(self, ids: Optional[Iterable[int]] = None) -> list[Bulb]:
+        await self._ensure_loaded()
+        if ids is None:
+            return list(self._bulbs.values())
+        return [self._bulbs[id] for id in ids if id in self._bulbs]
+
+    async def get_bulbs_by_ip(self, ips: Iterable[str]) -> list[Bulb]:
+        await self._ensure_loaded()
+        return [self._bulbs_by_ip[ip] for ip in ips if ip in self._bulbs_by_ip]
+
+    async def get_room(self, id: int) -> Room:
+        await self._ensure_loaded()
+        try:
+            return self._rooms[id]
+        except KeyError:
+            raise DoesNotExist(f"Room {id} does not exist")
+
+    async def get_rooms(self, ids: Optional[Iterable[int]] = None) -> list[Room]:
+        await self._ensure_loaded()
+        if ids is None:
+            return list(self._rooms.values())
+        return [self._rooms[id] for id in ids if id in self._rooms]
+
+    async def get_room_bulbs(self, room_ids: Iterable[int]) -> list[Bulb]:
+        rooms = await self.get_rooms(room_ids)
+        return [bulb for room in rooms for bulb in room.bulbs]
+
+    async def _ensure_loaded(self) -> None:
+        while self._loaded_version != self._version:
+            # Concurrent lookups share one reload
+            if self._loading is None:
+                self._loading = asyncio.create_task(self.load())
+                self._loading.add_done_callback(self._finish_loading)
+            await asyncio.shield(self._loading)
+
+    def _finish_loading(self, task: asyncio.Task) -> None:
+        self._loading = None
+        if not task.cancelled():
+            task.exception()
+
+
+REGISTRY = Registry()
@@ -1,5 +1,6 @@
 import os
-from typing import Optional
+from typing import Optional, Union
+from urllib.parse import parse_qsl, urlencode
 
 from pydantic_core import Url
 from pydantic_settings import BaseSettings
@@ -8,7 +9,70 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     env: str
     db_url: Optional[Url] = Url("sqlite://db.sql")
+    # Applied to SQLite connections, Tortoise keeps one connection per worker.
+    # NORMAL is durable in WAL mode and skips the fsync on every commit
+    sqlite_pragmas: dict[str, Union[str, int]] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    }
     static_redirects: dict[str, str] = {"/home": "/"}
+    # Logger name to level, DEBUG on tortoise.db_client prints the SQL
+    log_levels: dict[str, str] = {"tortoise.db_client": "DEBUG", "src": "INFO"}
+    # Fraction of DEBUG records that are written, the rest are dropped
+    log_debug_sample_rate: float = 0.1
+    # Seconds a polled bulb state is served from memory
+    bulb_state_ttl: float = 1.5
+    # Update the stored state from a successful setPilot instead of polling
+    bulb_write_through: bool = True
+    # Seconds after a write-through to confirm the state with getPilot
+    bulb_verify_write_delay: Optional[float] = None
+    # Decode bulb replies with ujson instead of the stdlib json module
+    wiz_fast_parser: bool = True
+    # Seconds between resends of an unanswered bulb request and the overall
+    # budget of the call, reads and writes separately
+    wiz_read_retry_intervals: list[float] = [0.1, 0.25, 0.5]
+    wiz_read_deadline: float = 1
+    wiz_write_retry_intervals: list[float] = [0.1, 0.25, 0.5]
+    wiz_write_deadline: float = 1.5
+    # Fraction of random jitter applied to the resend intervals
+    wiz_retry_jitter: float = 0.2
+    # Consecutive timeouts before a bulb is treated as offline without asking,
+    # and the seconds between probes of an offline bulb (doubling up to max)
+    bulb_circuit_failure_threshold: int = 3
+    bulb_circuit_cooldown: float = 5
+    bulb_circuit_max_cooldown: float = 60
+    # Seconds a room render waits for bulb states before using the last known
+    room_state_render_budget: float = 0.3
+    # Bulk commands: in-flight requests overall and per access point, and
+    # seconds between two datagrams through the same access point
+    fanout_max_concurrency: int = 32
+    fanout_max_concurrency_per_access_point: int = 8
+    fanout_packet_interval: float = 0.005
+    # Access point name to the networks (CIDR) of the bulbs connected to it,
+    # bulbs outside all of them share one default group
+    access_points: dict[str, list[str]] = {}
+    # Rendered component fragments kept in memory
+    fragment_cache_size: int = 1024
+    # Responses from this many bytes are compressed, brotli when the Brotli
+    # package is installed and the client accepts it, otherwise gzip
+    compression_min_size: int = 1024
+    gzip_compression_level: int = 6
+    brotli_compression_quality: int = 4
+    # Subnet broadcast address for whole-house commands, None sends unicast
+    # only. Opt-in: a broadcast also switches WiZ bulbs that aren't in the app
+    wiz_broadcast_address: Optional[str] = None
+    # Seconds to collect broadcast acknowledgements before retrying by unicast
+    wiz_broadcast_timeout: float = 0.5
+    # Background polling, intervals in seconds
+    bulb_poller_enabled: bool = True
+    bulb_poll_min_interval: float = 2
+    bulb_poll_max_interval: float = 30
+    bulb_poll_offline_max_interval: float = 120
+    bulb_poll_refresh_bulbs_interval: float = 60
     temperature_settings: list[tuple[str, str]] = [
         ("warmest", "Najcieplejszy"),
         ("warmer", "Cieplejszy"),
@@ -53,5 +117,16 @@ class Settings(BaseSettings):
         ("33", "Diwali"),
     ]
 
+    def get_db_url(self) -> str:
+        """db_url with sqlite_pragmas as parameters, the url's own ones win."""
+        if self.db_url.scheme != "sqlite" or not self.sqlite_pragmas:
+            return str(self.db_url)
+
+        # Only the query is rebuilt, sqlite:///absolute/path has no host that
+        # would survive being put back together from parts
+        url, _, query = str(self.db_url).partition("?")
+        params = {**self.sqlite_pragmas, **dict(parse_qsl(query))}
+        return f"{url}?{urlencode(params)}"
+
 
 SETTINGS = Settings(env=os.getenv("ENV", "dev"))
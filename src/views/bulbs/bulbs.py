@@ -1,33 +1,29 @@
-from typing import Literal
+from typing import AsyncIterator, Literal
 
 from dominate.svg import svg, circle
 from dominate.tags import div, section, span, nav, ul, li, p
 from sanic import Request, Sanic, html
 from sanic.views import HTTPMethodView
-from sanic_ext import serializer
-from tortoise.transactions import atomic
 
-from src.components.base_page import BasePage
+from src.components.base_page import BasePage, StreamSlot
 from src.components.breadcrumbs import Breadcrumbs
 from src.components.crud_options import CrudOptionsMenu
 from src.components.material_icons import Icon
 from src.components.new_item_button import NewItemButton
 from src.components.spinner import Spinner
 from src.models.bulb import Bulb
+from src.registry import REGISTRY
 from src.views import NAVIGATION, Page, BaseContext
 
 
 def create_view(app: Sanic) -> None:
     class BulbsView(HTTPMethodView):
-        decorators = [atomic(), serializer(html)]
         page = Page(
             name="BulbsView",
             title="Żarówki",
         )
 
         async def get(self, request: Request):
-            bulbs = await Bulb.all().prefetch_related("room")
-
             base_ctx = BaseContext(app=app, current_page=self.page)
             navbar = base_ctx.app_navbar
 
@@ -45,17 +41,17 @@ def create_view(app: Sanic) -> None:
                         ),
                         class_name="flex flex-row justify-between items-center w-full h-full my-6 mx-auto py-4 px-2",
                     ),
-                    bulbs_list(bulbs, app),
+                    bulbs_list(),
                     class_name="block w-full max-w-screen-xl mx-auto",
                 ),
                 title=self.page.title,
             )
 
-            return page_content.render()
+            await page_content.stream(request, stream_bulb_items(app))
 
     async def get_bulb_state_indicator(request: Request, id: int):
         type_: Literal["color"] | None = request.args.get("type")
-        bulb = await Bulb.get(id=id)
+        bulb = await REGISTRY.get_bulb(id)
         await bulb.assign_wiz_info()
 
         state = None
@@ -82,42 +78,50 @@ def create_view(app: Sanic) -> None:
     NAVIGATION["bulbs"] = BulbsView.page
 
 
-def bulbs_list(bulbs: list[Bulb], app: Sanic) -> nav:
-    with nav(
+def bulbs_list() -> nav:
+    return nav(
+        ul(StreamSlot(), class_name="w-full flex flex-col"),
         class_name="w-5/6 h-full mx-auto rounded-md gap-1 "
-        "font-sans text-blue-gray-700 shadow-md border border-gray-100"
-    ) as nav_:
-        with ul(class_name="w-full flex flex-col"):
-            for bulb in bulbs:
-                with li(
-                    class_name="w-full flex flex-row items-center justify-between rounded-md p-3 "
-                    "hover:bg-blue-500 hover:bg-opacity-80 hover:text-white focus:bg-blue-500 "
-                    "focus:bg-opacity-80 focus:text-white active:bg-blue-gray-50 "
-                ):
-                    Icon("lightbulb", class_name="material-symbols-rounded")
-                    p(bulb.name, class_name="text-xs")
-                    span(
-                        bulb.ip,
-                        role="button",
-                        class_name="px-2 py-1 font-sans text-xs font-bold text-gray-900 bg-gray-100 uppercase "
-                        "rounded-full",
-                    )
-                    div(
-                        Spinner(htmx_indicator=True),
-                        class_name="w-full",
-                        **{
-                            # TODO: change to constant url
-                            "hx-get": f"/bulb_state/{bulb.id}?type=color",
-                            "hx-swap": "outerHTML",
-                            "hx-trigger": "load",
-                        },
-                    )
-                    # More options
-                    CrudOptionsMenu(
-                        "more_horiz",
-                        app.url_for("BulbView", id=bulb.id),
-                        app.url_for("edit_bulb", bulb_id=bulb.id),
-                        "Usuń żarówkę",
-                        "Edytuj żarówkę",
-                    )
-    return nav_
+        "font-sans text-blue-gray-700 shadow-md border border-gray-100",
+    )
+
+
+async def stream_bulb_items(app: Sanic) -> AsyncIterator[str]:
+    bulbs = await Bulb.all().prefetch_related("room")
+    for bulb in bulbs:
+        yield bulb_item(bulb, app).render(pretty=False)
+
+
+def bulb_item(bulb: Bulb, app: Sanic) -> li:
+    with li(
+        class_name="w-full flex flex-row items-center justify-between rounded-md p-3 "
+        "hover:bg-blue-500 hover:bg-opacity-80 hover:text-white focus:bg-blue-500 "
+        "focus:bg-opacity-80 focus:text-white active:bg-blue-gray-50 "
+    ) as li_:
+        Icon("lightbulb", class_name="material-symbols-rounded")
+        p(bulb.name, class_name="text-xs")
+        span(
+            bulb.ip,
+            role="button",
+            class_name="px-2 py-1 font-sans text-xs font-bold text-gray-900 bg-gray-100 uppercase "
+            "rounded-full",
+        )
+        div(
+            Spinner(htmx_indicator=True),
+            class_name="w-full",
+            **{
+                # TODO: change to constant url
+                "hx-get": f"/bulb_state/{bulb.id}?type=color",
+                "hx-swap": "outerHTML",
+                "hx-trigger": "load",
+            },
+        )
+        # More options
+        CrudOptionsMenu(
+            "more_horiz",
+            app.url_for("BulbView", id=bulb.id),
+            app.url_for("edit_bulb", bulb_id=bulb.id),
+            "Usuń żarówkę",
+            "Edytuj żarówkę",
+        )
+    return li_
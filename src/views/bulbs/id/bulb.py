@@ -12,6 +12,7 @@ from src.components.base_page import BasePage
 from src.components.breadcrumbs import Breadcrumbs
 from src.models.bulb import Bulb, BulbForm
 from src.models.room import Room
+from src.registry import REGISTRY
 from src.views import Page, BaseContext
 from src.wiz import BulbParameters, WizMessage
 
@@ -35,6 +36,7 @@ def create_view(app: Sanic) -> None:
                 del form.room_id
 
             await Bulb.create(**form.data)
+            REGISTRY.invalidate()
             return redirect(
                 app.url_for("BulbsView"),
                 status=204,
@@ -52,6 +54,7 @@ def create_view(app: Sanic) -> None:
                 form.room_id.data = None
 
             await Bulb.filter(id=bulb_id).update(**form.data)
+            REGISTRY.invalidate()
             return redirect(
                 app.url_for("BulbsView"),
                 status=204,
@@ -62,6 +65,7 @@ def create_view(app: Sanic) -> None:
         async def delete(request: Request):
             bulb_id = request.args.get("id")
             await Bulb.filter(id=bulb_id).delete()
+            REGISTRY.invalidate()
             return redirect(
                 app.url_for("BulbsView"),
                 status=204,
@@ -71,7 +75,6 @@ def create_view(app: Sanic) -> None:
             )
 
     @serializer(html)
-    @atomic()
     async def new_bulb(request: Request):
         page = Page(
             name="new_bulb",
@@ -85,7 +88,6 @@ def create_view(app: Sanic) -> None:
         return view.render()
 
     @serializer(html)
-    @atomic()
     async def edit_bulb(request: Request, bulb_id: int):
         page = Page(
             name="edit_bulb",
@@ -122,7 +124,7 @@ def create_view(app: Sanic) -> None:
 
     # TODO: add option for room view alongside other inputs
     async def pick_random_color(request: Request, id: int):
-        bulb = await Bulb.get(id=id)
+        bulb = await REGISTRY.get_bulb(id)
         await bulb.send_message(
             WizMessage(
                 params=BulbParameters(
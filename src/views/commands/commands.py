@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    ValidationError,
+    model_validator,
+)
+from sanic import Request, Sanic, json
+
+from src.fanout import FAN_OUT
+from src.models.bulb import Bulb
+from src.registry import REGISTRY
+from src.views import ROUTES
+from src.wiz import BulbParameters, WizMessage
+
+
+@dataclass
+class Routes:
+    BULK_COMMANDS: str = "bulk_commands"
+
+
+class BulkCommandParams(BulbParameters):
+    # Accept the wire names bulbs use (dimming, temp, r...) next to the
+    # aliases, and fail loudly on anything else instead of dropping it
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+
+
+class BulkCommand(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    bulb_ids: list[int] = Field(default=[], description="Bulbs to send params to")
+    room_ids: list[int] = Field(
+        default=[], description="Rooms whose bulbs get the params"
+    )
+    params: BulkCommandParams
+
+    @model_validator(mode="after")
+    def check_targets(self) -> "BulkCommand":
+        if not self.bulb_ids and not self.room_ids:
+            raise ValueError("bulb_ids or room_ids is required")
+        return self
+
+
+class BulkCommandResult(BaseModel):
+    succeeded: list[int] = Field(description="Bulbs that acknowledged the command")
+    failed: list[int] = Field(description="Bulbs that didn't")
+    missing_bulb_ids: list[int] = Field(
+        default=[], description="Requested bulbs that don't exist"
+    )
+
+
+BULK_COMMANDS = TypeAdapter(list[BulkCommand])
+
+
+def create_view(app: Sanic) -> None:
+    async def bulk_commands(request: Request):
+        """Apply a list of commands in order, e.g.
+
+        [{"room_ids": [1], "params": {"state": true, "brightness": 40}},
+         {"bulb_ids": [3, 4], "params": {"state": false}}]
+        """
+        try:
+            commands = BULK_COMMANDS.validate_json(request.body)
+        except ValidationError as e:
+            return json(
+                {
+                    "errors": e.errors(
+                        include_url=False, include_context=False, include_input=False
+                    )
+                },
+                400,
+            )
+
+        bulbs = await get_command_bulbs(commands)
+        results = [await execute_command(command, bulbs) for command in commands]
+
+        return json({"results": [result.model_dump() for result in results]})
+
+    app.add_route(
+        bulk_commands, "api/commands", methods=["POST"], name=Routes.BULK_COMMANDS
+    )
+    ROUTES[Routes.BULK_COMMANDS] = Routes.BULK_COMMANDS
+
+
+async def get_command_bulbs(commands: list[BulkCommand]) -> list[Bulb]:
+    bulb_ids = {bulb_id for command in commands for bulb_id in command.bulb_ids}
+    room_ids = {room_id for command in commands for room_id in command.room_ids}
+    bulbs = await REGISTRY.get_bulbs(bulb_ids)
+    bulbs.extend(await REGISTRY.get_room_bulbs(room_ids))
+    return list({bulb.id: bulb for bulb in bulbs}.values())
+
+
+async def execute_command(command: BulkCommand, bulbs: list[Bulb]) -> BulkCommandResult:
+    targets = [
+        bulb
+        for bulb in bulbs
+        if bulb.id in command.bulb_ids or bulb.room_id in command.room_ids
+    ]
+    message = WizMessage(params=command.params)
+    results = await FAN_OUT.run(targets, lambda bulb: bulb.send_message(message))
+
+    found_ids = {bulb.id for bulb in targets}
+    return BulkCommandResult(
+        succeeded=[bulb.id for bulb, ok in zip(targets, results) if ok is True],
+        failed=[bulb.id for bulb, ok in zip(targets, results) if ok is not True],
+        missing_bulb_ids=[
+            bulb_id for bulb_id in command.bulb_ids if bulb_id not in found_ids
+        ],
+    )
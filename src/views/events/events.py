@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sanic import Request, Sanic
+
+from src.bulb_state import BULB_STATE
+from src.components.bulb_icon import BulbIcon
+from src.registry import REGISTRY
+from src.views import ROUTES
+from src.views.rooms.rooms import assign_rooms_state, room_state_fragments
+from src.wiz import WizGetResult
+
+# Comment line sent to keep proxies and the response timeout from closing the stream
+KEEP_ALIVE_INTERVAL = 15
+# Changes from one fan-out land within a few ms, send them as one batch
+BATCH_DELAY = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Routes:
+    BULB_STATE_EVENTS: str = "bulb_state_events"
+
+
+def create_view(app: Sanic) -> None:
+    async def bulb_state_events(request: Request):
+        changed_ips: asyncio.Queue[str] = asyncio.Queue()
+
+        def on_state_change(ip: str, _result: Optional[WizGetResult]) -> None:
+            changed_ips.put_nowait(ip)
+
+        unsubscribe = BULB_STATE.subscribe(on_state_change)
+        try:
+            response = await request.respond(
+                content_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+            while True:
+                try:
+                    ips = {
+                        await asyncio.wait_for(changed_ips.get(), KEEP_ALIVE_INTERVAL)
+                    }
+                except TimeoutError:
+                    await response.send(": keep-alive\n\n")
+                    continue
+
+                await asyncio.sleep(BATCH_DELAY)
+                while not changed_ips.empty():
+                    ips.add(changed_ips.get_nowait())
+
+                try:
+                    events = await render_state_events(app, ips)
+                except Exception:
+                    # One bad batch must not close the stream, later changes
+                    # re-render the same fragments
+                    logger.exception("Could not render bulb state events")
+                    continue
+                await response.send(events)
+        finally:
+            unsubscribe()
+
+    app.add_route(
+        bulb_state_events,
+        "events/bulbs",
+        methods=["GET"],
+        name=Routes.BULB_STATE_EVENTS,
+    )
+    ROUTES[Routes.BULB_STATE_EVENTS] = Routes.BULB_STATE_EVENTS
+
+
+async def render_state_events(app: Sanic, ips: set[str]) -> str:
+    bulbs = await REGISTRY.get_bulbs_by_ip(ips)
+    rooms = await REGISTRY.get_rooms({bulb.room_id for bulb in bulbs})
+    await asyncio.gather(
+        assign_rooms_state(rooms),
+        *[bulb.read_wiz_info() for bulb in bulbs],
+    )
+
+    events = [
+        format_event(BulbIcon.get_event_name(bulb), BulbIcon.render_cached(app, bulb))
+        for bulb in bulbs
+    ]
+    for room in rooms:
+        events.extend(
+            format_event(event, content)
+            for event, content in room_state_fragments(app, room)
+        )
+
+    return "".join(events)
+
+
+def format_event(event: str, content: str) -> str:
+    data = "".join(f"data: {line}\n" for line in content.splitlines())
+    return f"event: {event}\n{data}\n"
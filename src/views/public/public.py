@@ -0,0 +1,54 @@
+import mimetypes
+from dataclasses import dataclass
+from mimetypes import guess_type
+
+from sanic import Request, Sanic
+from sanic.exceptions import NotFound
+from sanic.response import file
+
+from src.assets import ASSETS, PUBLIC_DIR
+from src.middleware import accepted_encodings
+
+# Content-Encoding to the suffix build_assets.py gives the precompressed copy,
+# in order of preference
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+# Fingerprinted names change with their content, browsers never revalidate them
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Missing from the mimetypes of older systems
+mimetypes.add_type("font/woff2", ".woff2")
+
+
+@dataclass
+class Routes:
+    PUBLIC: str = "public"
+
+
+def create_view(app: Sanic) -> None:
+    async def public_file(request: Request, filename: str):
+        public_dir = PUBLIC_DIR.resolve()
+        path = (public_dir / filename).resolve()
+        if public_dir not in path.parents or not path.is_file():
+            raise NotFound(f"File {filename} not found")
+
+        headers = {"Vary": "Accept-Encoding"}
+        if ASSETS.is_fingerprinted(filename):
+            headers["cache-control"] = IMMUTABLE
+
+        accepted = accepted_encodings(request)
+        for encoding, suffix in PRECOMPRESSED:
+            compressed = path.with_name(path.name + suffix)
+            if encoding in accepted and compressed.is_file():
+                headers["Content-Encoding"] = encoding
+                return await file(
+                    compressed,
+                    request_headers=request.headers,
+                    mime_type=guess_type(path.name)[0],
+                    headers=headers,
+                )
+
+        return await file(path, request_headers=request.headers, headers=headers)
+
+    app.add_route(
+        public_file, "/public/<filename:path>", methods=["GET"], name=Routes.PUBLIC
+    )
@@ -11,6 +11,7 @@ from src.components.room_brightness_slider import RoomBrightnessSlider
 from src.components.room_light_switch import RoomLightSwitch
 from src.models.room import Room, RoomForm
 from src.control import change_brightness, toggle_state
+from src.registry import REGISTRY
 from src.views import Page, BaseContext
 
 
@@ -35,6 +36,7 @@ def create_view(app: Sanic) -> None:
         async def post(request: Request):
             form = RoomForm(request.form)
             await Room.create(**form.data)
+            REGISTRY.invalidate()
             return redirect(
                 app.url_for("RoomsView"),
                 status=204,
@@ -46,6 +48,7 @@ def create_view(app: Sanic) -> None:
             room_id = request.args.get("id")
             form = RoomForm(request.form)
             await Room.filter(id=room_id).update(**form.data)
+            REGISTRY.invalidate()
             return redirect(
                 app.url_for("RoomsView"),
                 status=204,
@@ -56,6 +59,7 @@ def create_view(app: Sanic) -> None:
         async def delete(request: Request):
             room_id = request.args.get("id")
             await Room.filter(id=room_id).delete()
+            REGISTRY.invalidate()
             return redirect(
                 app.url_for("RoomsView"),
                 status=204,
@@ -65,7 +69,6 @@ def create_view(app: Sanic) -> None:
             )
 
     @serializer(html)
-    @atomic()
     async def new_room(request: Request):
         page = Page(
             name="new_room",
@@ -76,7 +79,6 @@ def create_view(app: Sanic) -> None:
         return view.render()
 
     @serializer(html)
-    @atomic()
     async def edit_room(request: Request, room_id: int):
         page = Page(
             name="edit_room",
@@ -113,9 +115,9 @@ def create_view(app: Sanic) -> None:
 
     @serializer(html)
     async def room_bulbs_state(request: Request, id: int):
-        room = await Room.get(id=id).prefetch_related("bulbs")
+        room = await REGISTRY.get_room(id)
         await room.assign_room_state()
-        return RoomLightSwitch(app, room).render()
+        return RoomLightSwitch.render_cached(app, room)
 
     async def change_room_brightness(request: Request, id: int):
         # room = await Room.get(id=id).prefetch_related("bulbs")
@@ -137,9 +139,9 @@ def create_view(app: Sanic) -> None:
         brightness = int(request.form.get("group_brightness"))
         await change_brightness(bulb_ids, brightness)
 
-        room = await Room.get(id=id).prefetch_related("bulbs")
+        room = await REGISTRY.get_room(id)
         await room.assign_room_brightness()
-        res = html(RoomBrightnessSlider(app, room).render())
+        res = html(RoomBrightnessSlider.render_cached(app, room))
 
         if len(bulb_ids) > 0:
             hx_trigger = "change-room-state"
@@ -158,9 +160,9 @@ def create_view(app: Sanic) -> None:
         bulb_state = get_room_state_from_form(request.form)
         await toggle_state(bulb_ids, bulb_state)
 
-        room = await Room.get(id=id).prefetch_related("bulbs")
+        room = await REGISTRY.get_room(id)
         await room.assign_room_brightness()
-        res = html(RoomBrightnessSlider(app, room).render())
+        res = html(RoomBrightnessSlider.render_cached(app, room))
 
         if len(bulb_ids) > 0:
             hx_trigger = "change-room-state"
@@ -170,9 +172,9 @@ def create_view(app: Sanic) -> None:
 
     @serializer(html)
     async def room_bulbs_brightness(request: Request, id: int):
-        room = await Room.get(id=id).prefetch_related("bulbs")
+        room = await REGISTRY.get_room(id)
         await room.assign_room_brightness()
-        return RoomBrightnessSlider(app, room).render()
+        return RoomBrightnessSlider.render_cached(app, room)
 
     app.add_route(RoomView.as_view(), "/room")
     app.add_route(new_room, "rooms/new", methods=["GET"], name="new_room")
@@ -1,7 +1,7 @@
 import asyncio
 import shutil
 from dataclasses import dataclass
-from typing import Any, Callable, Coroutine, Literal, Optional
+from typing import Any, AsyncIterator, Callable, Coroutine, Literal, Optional
 
 from dominate.tags import (
     button,
@@ -17,27 +17,32 @@ from dominate.tags import (
     span,
 )
 from sanic import HTTPResponse, Request, Sanic, json
+from sanic.exceptions import NotFound
 from sanic.response import html
 from sanic.views import HTTPMethodView
 from sanic_ext import serializer
-from tortoise.transactions import atomic
 
-from src.components.base_page import BasePage
+from src.components.base_page import BasePage, StreamSlot
 from src.components.breadcrumbs import Breadcrumbs
 from src.components.bulb_icon import BulbIcon
 from src.components.checkbox import Checkbox
 from src.components.crud_options import CrudOptionsMenu
+from src.components.fragment_cache import FRAGMENT_CACHE
 from src.components.material_icons import Icon
 from src.components.new_item_button import NewItemButton
 from src.components.nothing_here import NothingHere
 from src.components.room_brightness_slider import RoomBrightnessSlider
 from src.components.room_light_switch import RoomLightSwitch
-from src.control import set_scene_id, set_temperature_by_name
+from src.control import (
+    set_scene_id,
+    set_temperature_by_name,
+    turn_all_off as turn_all_bulbs_off,
+)
 from src.models.bulb import Bulb
 from src.models.room import Room
+from src.registry import REGISTRY
 from src.utils import run_command
 from src.views import NAVIGATION, ROUTES, BaseContext, Page
-from src.wiz import send_message_to_wiz, MESSAGES
 
 
 @dataclass
@@ -47,6 +52,8 @@ class Routes:
     SELECT_SCENE_ID: str = "set_scene_id"
     SELECT_TEMPERATURE: str = "set_temperature_by_name"
     TURN_ALL_OFF: str = "turn_all_off"
+    ROOMS_SNAPSHOT: str = "rooms_snapshot"
+    ROOM_SNAPSHOT: str = "room_snapshot"
 
 
 @dataclass
@@ -56,17 +63,12 @@ class Selectors:
 
 def create_view(app: Sanic) -> None:
     class RoomsView(HTTPMethodView):
-        decorators = [atomic(), serializer(html)]
         page = Page(
             name="RoomsView",
             title="Pokoje",
         )
 
         async def get(self, request: Request):
-            rooms = await Room.filter(
-                # name="Gabinet",
-            ).prefetch_related("bulbs")
-
             base_ctx = BaseContext(app=app, current_page=self.page)
             navbar = base_ctx.app_navbar
             scenes = base_ctx.settings.scenes
@@ -99,21 +101,53 @@ def create_view(app: Sanic) -> None:
                         class_name="flex flex-row justify-between items-center w-full h-full my-6 mx-auto px-2",
                     ),
                     div(
-                        room_card_grid(rooms, app, scenes, temperature_settings),
+                        room_card_grid(),
                         class_name="w-full h-full max-w-screen-xl pb-6 px-4 mx-auto",
+                        **{
+                            "hx-get": app.url_for(Routes.ROOMS_SNAPSHOT),
+                            "hx-trigger": "load",
+                            "hx-swap": "none",
+                            "hx-ext": "sse",
+                            "sse-connect": app.url_for(ROUTES["bulb_state_events"]),
+                        },
                     ),
                     class_name="block w-full max-w-screen-xl mx-auto",
                 ),
                 title=self.page.title,
             )
 
-            return page_content.render()
+            await page_content.stream(
+                request, stream_room_cards(app, scenes, temperature_settings)
+            )
 
     @serializer(html)
     async def get_bulb_with_state(request: Request, id: int):
-        bulb = await Bulb.get(id=id)
+        bulb = await REGISTRY.get_bulb(id)
         await bulb.assign_wiz_info()
-        return BulbIcon(app, bulb).render()
+        return BulbIcon.render_cached(app, bulb)
+
+    async def get_rooms_snapshot(request: Request, id: Optional[int] = None):
+        # Fills the lazy_load placeholders of the room cards out of band, the
+        # bulb state event stream keeps them current afterwards
+        rooms = await REGISTRY.get_rooms([id] if id is not None else None)
+        if id is not None and not rooms:
+            raise NotFound(f"Room {id} does not exist")
+        await assign_rooms_state(rooms)
+
+        fragments = [
+            (BulbIcon.get_event_name(bulb), BulbIcon.render_cached(app, bulb))
+            for room in rooms
+            for bulb in room.bulbs
+        ]
+        for room in rooms:
+            fragments.extend(room_state_fragments(app, room))
+
+        return html(
+            "".join(
+                f'<div id="{element_id}" hx-swap-oob="innerHTML">{content}</div>'
+                for element_id, content in fragments
+            )
+        )
 
     def change_bulb_state_handler(
         state: bool,
@@ -121,11 +155,10 @@ def create_view(app: Sanic) -> None:
         hx_trigger = "change-bulb-state"
 
         async def handler(request: Request, id: int):
-            bulb = await Bulb.get(id=id)
+            bulb = await REGISTRY.get_bulb(id)
             await bulb.toggle_state(state)
-            content = BulbIcon(app, bulb)
 
-            res = html(content.render())
+            res = html(BulbIcon.render_cached(app, bulb))
             res.headers.add("HX-Trigger", hx_trigger)
 
             return res
@@ -133,11 +166,7 @@ def create_view(app: Sanic) -> None:
         return handler
 
     async def turn_all_off(request: Request):
-        bulbs = await Bulb.all()
-
-        await asyncio.gather(
-            *[send_message_to_wiz(bulb.ip, MESSAGES["OFF"]) for bulb in bulbs]
-        )
+        await turn_all_bulbs_off()
 
         res = html("ok")
         res.headers.add("HX-Trigger", "turn-all-off")
@@ -226,6 +255,18 @@ def create_view(app: Sanic) -> None:
         "bulbs/<id:int>/state",
         name=BulbIcon.route,
     )
+    app.add_route(
+        get_rooms_snapshot,
+        "rooms/snapshot",
+        methods=["GET"],
+        name=Routes.ROOMS_SNAPSHOT,
+    )
+    app.add_route(
+        get_rooms_snapshot,
+        "rooms/<id:int>/snapshot",
+        methods=["GET"],
+        name=Routes.ROOM_SNAPSHOT,
+    )
     app.add_route(
         change_bulb_state_handler(True), "bulbs/<id:int>/on", name=Routes.TURN_BULB_ON
     )
@@ -264,24 +305,74 @@ def create_view(app: Sanic) -> None:
     ROUTES[Routes.SELECT_SCENE_ID] = Routes.SELECT_SCENE_ID
     ROUTES[Routes.SELECT_TEMPERATURE] = Routes.SELECT_TEMPERATURE
     ROUTES[Routes.TURN_ALL_OFF] = Routes.TURN_ALL_OFF
+    ROUTES[Routes.ROOMS_SNAPSHOT] = Routes.ROOMS_SNAPSHOT
+    ROUTES[Routes.ROOM_SNAPSHOT] = Routes.ROOM_SNAPSHOT
+
+
+async def assign_rooms_state(rooms: list[Room]) -> None:
+    # One parallel fan-out, the room aggregates below then read from memory
+    await asyncio.gather(*[room.assign_bulbs_wiz_info() for room in rooms])
+    for room in rooms:
+        room.update_bulbs_state()
+        room.update_bulbs_brightness()
+
+
+def room_state_fragments(app: Sanic, room: Room) -> list[tuple[str, str]]:
+    """Rendered room-wide controls of a room card, keyed by their placeholder id."""
+    return [
+        (
+            RoomLightSwitch.get_event_name(room),
+            RoomLightSwitch.render_cached(app, room),
+        ),
+        (
+            RoomBrightnessSlider.get_event_name(room),
+            RoomBrightnessSlider.render_cached(app, room),
+        ),
+    ]
+
+
+def room_card_grid() -> html_tag:
+    return div(
+        StreamSlot(),
+        class_name="grid grid-flow-row gap-8 sm:grid-cols-2 md:grid-cols-3 "
+        "lg:grid-cols-4",
+    )
 
 
-def room_card_grid(
-    rooms: list[Room],
+async def stream_room_cards(
     app: Sanic,
     scenes: list[tuple[str, str]],
     temperature_settings: list[tuple[str, str]],
-) -> html_tag:
-    with div(
-        class_name="grid grid-flow-row gap-8 sm:grid-cols-2 md:grid-cols-3 "
-        "lg:grid-cols-4"
-    ) as div_:
-        if len(rooms) == 0:
-            NothingHere()
-        else:
-            for room in rooms:
-                room_card(room, app, scenes, temperature_settings)
-    return div_
+) -> AsyncIterator[str]:
+    rooms = await Room.filter(
+        # name="Gabinet",
+    ).prefetch_related("bulbs")
+
+    if len(rooms) == 0:
+        yield NothingHere().render(pretty=False)
+    for room in rooms:
+        yield render_room_card(room, app, scenes, temperature_settings)
+
+
+def render_room_card(
+    room: Room,
+    app: Sanic,
+    scenes: list[tuple[str, str]],
+    temperature_settings: list[tuple[str, str]],
+) -> str:
+    state = (
+        room.name,
+        room.description,
+        tuple((bulb.id, bulb.name) for bulb in room.bulbs),
+        tuple(scenes),
+        tuple(temperature_settings),
+    )
+    return FRAGMENT_CACHE.render(
+        "room_card",
+        room.id,
+        state,
+        lambda: room_card(room, app, scenes, temperature_settings),
+    )
 
 
 def room_card(
@@ -346,7 +437,7 @@ def room_card(
         with div(class_name="flex flex-col items-end gap-1 px-6 h-min"):
             for bulb in room.bulbs:
                 with div(class_name="flex flex-row w-full gap-3"):
-                    BulbIcon.lazy_load(app, bulb)
+                    BulbIcon.lazy_load(bulb)
                     Checkbox(
                         name=f"include-bulb-{bulb.id}",
                         id_=f"include-bulb-{bulb.id}",
@@ -361,8 +452,8 @@ def room_card(
                 with div(
                     class_name="w-full flex flex-col justify-center items-end gap-y-4"
                 ):
-                    RoomBrightnessSlider.lazy_load(app, room)
-                    RoomLightSwitch.lazy_load(app, room)
+                    RoomBrightnessSlider.lazy_load(room)
+                    RoomLightSwitch.lazy_load(room)
                     # TODO: move to component
                     # Select scene id
                     with div(class_name="relative h-10 w-full"):
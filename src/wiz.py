@@ -1,38 +1,343 @@
 import asyncio
+import itertools
 import json
-from typing import ByteString, Literal, Optional, Tuple, Union
+import random
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import ByteString, Iterator, Literal, Optional, Tuple, Union
 
-from pydantic import BaseModel, Field
+import ujson
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError
+
+from src.bulb_health import BULB_HEALTH
+from src.settings import SETTINGS
 
 UDP_PORT = 38899
-BULB_RESPONSE_TIMEOUT = 1
 
+# ujson decodes bulb replies several times faster than the stdlib
+json_loads = ujson.loads if SETTINGS.wiz_fast_parser else json.loads
 
-class FutureResponseDatagramProtocol(asyncio.DatagramProtocol):
-    def __init__(
-        self,
-        response_future: asyncio.Future,
-    ) -> None:
+PendingKey = Tuple[Tuple[str, int], str]
+InFlightKey = Tuple[Tuple[str, int], bytes]
+
+# Seconds a reply to a resent copy of a settled request may still arrive
+STALE_REPLY_WINDOW = 1.0
+INVALID_RESPONSE_ERROR_MESSAGE = "Invalid bulb response"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When to resend a request that got no reply and when to give up.
+
+    A lost datagram costs one interval instead of the whole deadline.
+    """
+
+    # Seconds to wait after each send, the last one repeats until the deadline
+    intervals: tuple[float, ...]
+    # Seconds the whole call may take
+    deadline: float
+    # Each interval is randomly stretched or shrunk by up to this fraction
+    jitter: float = 0.2
+
+    def delays(self) -> Iterator[float]:
+        for interval in itertools.chain(
+            self.intervals, itertools.repeat(self.intervals[-1])
+        ):
+            yield interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+READ_RETRY_POLICY = RetryPolicy(
+    intervals=tuple(SETTINGS.wiz_read_retry_intervals),
+    deadline=SETTINGS.wiz_read_deadline,
+    jitter=SETTINGS.wiz_retry_jitter,
+)
+WRITE_RETRY_POLICY = RetryPolicy(
+    intervals=tuple(SETTINGS.wiz_write_retry_intervals),
+    deadline=SETTINGS.wiz_write_deadline,
+    jitter=SETTINGS.wiz_retry_jitter,
+)
+
+
+class WizDatagramProtocol(asyncio.DatagramProtocol):
+    """Process-wide UDP endpoint shared by every bulb request on an event loop.
+
+    Replies are matched to pending requests by source address and method, so
+    one bound socket can serve any number of concurrent bulb commands.
+    """
+
+    def __init__(self) -> None:
         """Init the protocol."""
-        self.response_future = response_future
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.connected: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.pending: dict[PendingKey, deque[asyncio.Future]] = {}
+        self.in_flight: dict[InFlightKey, asyncio.Task] = {}
+        # Expiry times of replies still owed to settled requests, one per copy
+        self.stale_replies: dict[PendingKey, deque[float]] = {}
+        # Last round trip measured from a request answered on its first copy
+        self.round_trips: dict[Tuple[str, int], float] = {}
+
+    @property
+    def is_closed(self) -> bool:
+        return self.transport is not None and self.transport.is_closing()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Store the transport once the socket is bound."""
+        self.transport = transport
+        self.connected.set_result(None)
 
     def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
-        """Trigger on_response."""
-        self.response_future.set_result(data)
+        """Resolve the oldest request waiting for a reply from this address."""
+        try:
+            response_data = json_loads(data)
+        except ValueError:
+            return
+        if not isinstance(response_data, dict):
+            return
+        # Replies don't say which copy they answer, a late one must not
+        # acknowledge the next request to the same bulb
+        if self._drop_stale_reply(addr[:2], response_data.get("method")):
+            return
+
+        waiters = self._get_waiters(addr[:2], response_data.get("method"))
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(response_data)
+                break
 
     def error_received(self, exc: Optional[Exception]) -> None:
-        """Handle error."""
-        self.response_future.set_exception(
-            exc if exc else Exception(f"FutureResponseDatagramProtocol error: {exc}")
-        )
+        """Errors on a shared socket can't be attributed to one bulb, let requests time out."""
 
     def connection_lost(self, exc: Optional[Exception]) -> None:
-        """The connection is lost."""
-        self.response_future.set_exception(
-            exc
-            if exc
-            else Exception(f"FutureResponseDatagramProtocol connection lost: {exc}")
+        """The connection is lost, fail everything still waiting for a reply."""
+        for waiters in self.pending.values():
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(
+                        exc
+                        if exc
+                        else ConnectionError("WizDatagramProtocol connection lost")
+                    )
+        self.pending.clear()
+
+    async def request(
+        self,
+        remote_addr: Tuple[str, int],
+        message_bytes: bytes,
+        method: str,
+        policy: RetryPolicy,
+    ) -> dict:
+        """Send a datagram and wait for the matching reply.
+
+        The datagram is resent following the policy, a late reply to any of
+        the copies resolves the request. Replies to the copies still on their
+        way are dropped when they arrive.
+        """
+        key, response_future = self._expect(remote_addr, method)
+        event_loop = asyncio.get_running_loop()
+        deadline = event_loop.time() + policy.deadline
+        sent_at: list[float] = []
+        try:
+            for delay in policy.delays():
+                remaining = deadline - event_loop.time()
+                if remaining <= 0:
+                    raise TimeoutError
+                self.transport.sendto(message_bytes, remote_addr)
+                sent_at.append(event_loop.time())
+                await asyncio.wait([response_future], timeout=min(delay, remaining))
+                if response_future.done():
+                    return response_future.result()
+        finally:
+            answered = (
+                response_future.done()
+                and not response_future.cancelled()
+                and response_future.exception() is None
+            )
+            self._expect_stale_replies(
+                key, self._count_late_copies(remote_addr, sent_at, answered)
+            )
+            self._discard(key, response_future)
+            response_future.cancel()
+
+    async def request_coalesced(
+        self,
+        remote_addr: Tuple[str, int],
+        message_bytes: bytes,
+        method: str,
+        policy: RetryPolicy,
+    ) -> dict:
+        """Like request, but identical concurrent requests share one datagram."""
+        key = (remote_addr, message_bytes)
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(
+                self.request(remote_addr, message_bytes, method, policy)
+            )
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish_in_flight(key, done))
+        # Shielded so a cancelled caller doesn't cancel the others' request
+        return await asyncio.shield(task)
+
+    async def broadcast(
+        self,
+        broadcast_addr: Tuple[str, int],
+        remote_addrs: list[Tuple[str, int]],
+        message_bytes: bytes,
+        method: str,
+        timeout: float,
+    ) -> dict[Tuple[str, int], dict]:
+        """Send one datagram to a broadcast address and collect the replies.
+
+        Only replies from remote_addrs are returned, waiting stops as soon as
+        all of them answered or the timeout passes.
+        """
+        waiters = [self._expect(remote_addr, method) for remote_addr in remote_addrs]
+        try:
+            self.transport.sendto(message_bytes, broadcast_addr)
+            if waiters:
+                await asyncio.wait(
+                    [response_future for _, response_future in waiters],
+                    timeout=timeout,
+                )
+        finally:
+            for key, response_future in waiters:
+                self._discard(key, response_future)
+                response_future.cancel()
+
+        return {
+            key[0]: response_future.result()
+            for key, response_future in waiters
+            if response_future.done()
+            and not response_future.cancelled()
+            and response_future.exception() is None
+        }
+
+    def _expect(
+        self, remote_addr: Tuple[str, int], method: str
+    ) -> Tuple[PendingKey, asyncio.Future]:
+        # Registered before sending, a fast reply must find its waiter
+        key = (remote_addr, method)
+        response_future = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(key, deque()).append(response_future)
+        return key, response_future
+
+    def _count_late_copies(
+        self, remote_addr: Tuple[str, int], sent_at: list[float], answered: bool
+    ) -> int:
+        """Copies of a settled request whose reply may still arrive.
+
+        A copy that was lost owes no reply, so only the copies sent less than
+        one round trip before the request settled count.
+        """
+        settled_at = asyncio.get_running_loop().time()
+        if answered and len(sent_at) == 1:
+            self.round_trips[remote_addr] = settled_at - sent_at[0]
+            return 0
+        round_trip = self.round_trips.get(remote_addr)
+        if round_trip is None:
+            # Nothing to tell a lost copy from a slow one, assume the last
+            # copy was answered and the others were lost
+            return 0
+        if not answered:
+            return sum(1 for sent in sent_at if settled_at - sent < round_trip)
+        # The answered copy is the one whose round trip is the closest match,
+        # the replies to the copies sent after it are still on their way
+        answered_copy = min(
+            range(len(sent_at)),
+            key=lambda copy: abs(settled_at - sent_at[copy] - round_trip),
         )
+        return len(sent_at) - 1 - answered_copy
+
+    def _expect_stale_replies(self, key: PendingKey, count: int) -> None:
+        if count <= 0:
+            return
+        expires_at = asyncio.get_running_loop().time() + STALE_REPLY_WINDOW
+        self.stale_replies.setdefault(key, deque()).extend([expires_at] * count)
+
+    def _drop_stale_reply(self, addr: Tuple[str, int], method: Optional[str]) -> bool:
+        key = (addr, method)
+        expiries = self.stale_replies.get(key)
+        if not expiries:
+            return False
+
+        now = asyncio.get_running_loop().time()
+        while expiries and expiries[0] < now:
+            expiries.popleft()
+        dropped = bool(expiries)
+        if dropped:
+            expiries.popleft()
+        if not expiries:
+            del self.stale_replies[key]
+        return dropped
+
+    def _finish_in_flight(self, key: InFlightKey, task: asyncio.Task) -> None:
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Mark the exception as retrieved, callers may all have been cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _get_waiters(
+        self, addr: Tuple[str, int], method: Optional[str]
+    ) -> Optional[deque[asyncio.Future]]:
+        if method is not None:
+            return self.pending.get((addr, method))
+        # Error replies may come without a method, hand them to any request
+        for (pending_addr, _), waiters in self.pending.items():
+            if pending_addr == addr and waiters:
+                return waiters
+        return None
+
+    def _discard(self, key: PendingKey, response_future: asyncio.Future) -> None:
+        waiters = self.pending.get(key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(response_future)
+        except ValueError:
+            pass
+        if not waiters:
+            del self.pending[key]
+
+
+# One endpoint per event loop, Sanic workers and tests each run their own loop
+_PROTOCOLS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+async def get_wiz_protocol() -> WizDatagramProtocol:
+    event_loop = asyncio.get_running_loop()
+    protocol = _PROTOCOLS.get(event_loop)
+
+    if protocol is None or protocol.is_closed:
+        protocol = WizDatagramProtocol()
+        _PROTOCOLS[event_loop] = protocol
+        try:
+            await event_loop.create_datagram_endpoint(
+                lambda: protocol, local_addr=("0.0.0.0", 0), allow_broadcast=True
+            )
+        except BaseException as e:
+            _PROTOCOLS.pop(event_loop, None)
+            # Callers that picked the protocol up meanwhile wait on it too
+            if not protocol.connected.done():
+                protocol.connected.set_exception(
+                    e
+                    if isinstance(e, Exception)
+                    else ConnectionError("WizDatagramProtocol binding cancelled")
+                )
+                # Retrieved here, there may be no other caller to do it
+                protocol.connected.exception()
+            raise
+
+    await asyncio.shield(protocol.connected)
+    return protocol
+
+
+def close_wiz_protocol() -> None:
+    protocol = _PROTOCOLS.pop(asyncio.get_running_loop(), None)
+    if protocol and protocol.transport:
+        protocol.transport.close()
 
 
 class BulbParameters(BaseModel):
@@ -93,8 +398,23 @@ class WizMessage(BaseModel):
         default={}, description="Parameters for the bulb method"
     )
 
+    _wire_bytes: Optional[bytes] = PrivateAttr(default=None)
+
+    def to_bytes(self) -> bytes:
+        """Datagram payload, serialized once per message instance.
+
+        Messages are treated as immutable once sent, build a new one instead
+        of changing the params of an existing one.
+        """
+        if self._wire_bytes is None:
+            self._wire_bytes = self.model_dump_json(exclude_none=True).encode("utf-8")
+        return self._wire_bytes
+
 
 class WizGetResult(BaseModel):
+    # Bulbs report the white channels as "c" and "w", not by their aliases
+    model_config = ConfigDict(populate_by_name=True)
+
     mac: Optional[str] = Field(default=None, description="MAC address of the bulb")
     rssi: Optional[int] = Field(default=None, description="Signal strength of the bulb")
     src: Optional[str] = Field(default=None, description="Source of the message")
@@ -182,54 +502,140 @@ MESSAGES = {
     ),
 }
 
+# Serialize the static table up front, hot commands never touch pydantic
+for _message in MESSAGES.values():
+    _message.to_bytes()
+
+
+@lru_cache(maxsize=128)
+def get_brightness_message(brightness: int) -> WizMessage:
+    if brightness <= 0:
+        return MESSAGES["OFF"]
+    return WizMessage(params=BulbParameters(state=True, brightness=brightness))
+
+
+@lru_cache(maxsize=64)
+def get_scene_message(scene_id: int) -> WizMessage:
+    return WizMessage(params=BulbParameters(state=True, sceneId=scene_id))
+
+
 ParsedBulbResponse = Tuple[
     Optional[WizError], Optional[Union[WizSetResult, WizGetResult]]
 ]
 
 
+def parse_get_result(result: dict) -> WizGetResult:
+    # Measured faster than both WizGetResult(**result) and model_construct
+    return WizGetResult.model_validate(result)
+
+
 def parse_bulb_response(
     response_message: ByteString,
     wiz_message_method: Literal["setPilot", "getPilot"] = "setPilot",
 ):
-    response_data = json.loads(response_message)
+    return parse_bulb_response_data(
+        json_loads(response_message), wiz_message_method=wiz_message_method
+    )
+
+
+def parse_bulb_response_data(
+    response_data: dict,
+    wiz_message_method: Literal["setPilot", "getPilot"] = "setPilot",
+):
     error = response_data.get("error")
     result = response_data.get("result")
 
     # TODO: implement error messages
     parsed_error = WizError(**error) if error else None
-    parsed_result = (
-        WizSetResult(**result if result else {"error": error})
-        if wiz_message_method == "setPilot"
-        else WizGetResult(**result)
-    )
+    if wiz_message_method == "setPilot":
+        return parsed_error, WizSetResult(**result if result else {"error": error})
+
+    # A state that can't be read is no state, callers treat it like no reply
+    if not result:
+        return parsed_error or INVALID_RESPONSE_ERROR_MESSAGE, None
+    try:
+        if SETTINGS.wiz_fast_parser:
+            parsed_result = parse_get_result(result)
+        else:
+            parsed_result = WizGetResult(**result)
+    except ValidationError:
+        return INVALID_RESPONSE_ERROR_MESSAGE, None
 
     return parsed_error, parsed_result
 
 
 async def send_message_to_wiz(
-    ip: str, message: WizMessage, port: int = UDP_PORT
+    ip: str,
+    message: WizMessage,
+    port: int = UDP_PORT,
+    policy: Optional[RetryPolicy] = None,
 ) -> Union[
     tuple[Union[None, WizSetResult, WizGetResult]], tuple[Union[str, WizError], None]
 ]:
+    if policy is None:
+        policy = (
+            READ_RETRY_POLICY if message.method == "getPilot" else WRITE_RETRY_POLICY
+        )
+
+    no_response_error_message = "Bulb offline"
+    # Don't wait a whole deadline on a bulb that keeps timing out
+    if not BULB_HEALTH.allow_request(ip):
+        return no_response_error_message, None
+
     try:
         remote_addr = (ip, port)
-        no_response_error_message = "Bulb offline"
-        message_bytes = message.model_dump_json(
-            exclude_none=True,
-        ).encode("utf-8")
-
-        response_future = asyncio.Future()
-        event_loop = asyncio.get_event_loop()
-        transport, _ = await event_loop.create_datagram_endpoint(
-            lambda: FutureResponseDatagramProtocol(response_future),
-            remote_addr=remote_addr,
-        )
+        message_bytes = message.to_bytes()
 
-        transport.sendto(message_bytes, remote_addr)
-        response_message = await asyncio.wait_for(
-            response_future, BULB_RESPONSE_TIMEOUT
+        protocol = await get_wiz_protocol()
+        # Reads are idempotent, concurrent ones to the same bulb share a reply
+        request = (
+            protocol.request_coalesced
+            if message.method == "getPilot"
+            else protocol.request
+        )
+        response_data = await request(
+            remote_addr, message_bytes, message.method, policy
+        )
+        BULB_HEALTH.record_success(ip)
+        return parse_bulb_response_data(
+            response_data, wiz_message_method=message.method
         )
-        return parse_bulb_response(response_message, wiz_message_method=message.method)
 
     except TimeoutError:
+        BULB_HEALTH.record_failure(ip)
         return no_response_error_message, None
+
+
+async def broadcast_message_to_wiz(
+    ips: list[str],
+    message: WizMessage,
+    broadcast_address: str,
+    port: int = UDP_PORT,
+) -> dict[str, ParsedBulbResponse]:
+    """Send a message to every bulb on the subnet with a single datagram.
+
+    Bulbs from ips that did not acknowledge the broadcast in time get the
+    message again by unicast, the results are keyed by ip.
+    """
+    protocol = await get_wiz_protocol()
+    replies = await protocol.broadcast(
+        (broadcast_address, port),
+        [(ip, port) for ip in ips],
+        message.to_bytes(),
+        message.method,
+        SETTINGS.wiz_broadcast_timeout,
+    )
+
+    results = {}
+    for (ip, _), response_data in replies.items():
+        BULB_HEALTH.record_success(ip)
+        results[ip] = parse_bulb_response_data(
+            response_data, wiz_message_method=message.method
+        )
+    missing = [ip for ip in ips if ip not in results]
+    retries = await asyncio.gather(
+        *[send_message_to_wiz(ip, message, port) for ip in missing]
+    )
+    results.update(zip(missing, retries))
+
+    return results
@@ -1,4 +1,5 @@
 module.exports = {
+    content: ["./src/**/*.py"],
     theme: {
         screens: {
             sm: "640px",
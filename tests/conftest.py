@@ -0,0 +1,40 @@
+import pytest
+import pytest_asyncio
+from sanic import Sanic
+from tortoise import Tortoise
+
+from main import attach_endpoints
+from src.bulb_state import BULB_STATE
+from src.components.fragment_cache import FRAGMENT_CACHE
+from src.registry import REGISTRY
+
+
+@pytest_asyncio.fixture
+async def db():
+    await Tortoise.init(
+        db_url="sqlite://:memory:",
+        modules={
+            "models": [
+                "src.models.bulb",
+                "src.models.room",
+                "src.models.icon",
+            ]
+        },
+    )
+    await Tortoise.generate_schemas()
+    # Module singletons must not serve another test's rows or states
+    REGISTRY.invalidate()
+    yield
+    REGISTRY.invalidate()
+    BULB_STATE.clear()
+    FRAGMENT_CACHE.clear()
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+def app() -> Sanic:
+    Sanic.test_mode = True
+    app = Sanic("smart-home-test")
+    attach_endpoints(app)
+    app.router.finalize()
+    return app
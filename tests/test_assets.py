@@ -0,0 +1,41 @@
+import json
+
+from build_assets import rewrite_font_urls
+from src.assets import CDN_URLS, AssetManifest
+
+
+def test_asset_manifest_prefers_vendored_files(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"htmx.js": "htmx.0123456789ab.js"}))
+    manifest = AssetManifest(path)
+
+    assert manifest.url("htmx.js") == "/public/htmx.0123456789ab.js"
+    assert manifest.url("alpine.js") == CDN_URLS["alpine.js"]
+    assert manifest.is_fingerprinted("htmx.0123456789ab.js")
+    assert not manifest.is_fingerprinted("manifest.json")
+
+
+def test_asset_manifest_falls_back_to_cdn_without_build(tmp_path):
+    manifest = AssetManifest(tmp_path / "manifest.json")
+
+    assert not manifest.has("tailwind.css")
+    assert manifest.url("htmx.js") == CDN_URLS["htmx.js"]
+
+
+def test_font_urls_point_to_vendored_files():
+    css = (
+        "@font-face {\n"
+        "  font-family: 'Material Icons Round';\n"
+        "  src: url(https://fonts.gstatic.com/s/materialiconsround/v108/icons.woff2)"
+        " format('woff2');\n"
+        "}\n"
+    )
+    filenames = {
+        "https://fonts.gstatic.com/s/materialiconsround/v108/icons.woff2": (
+            "icons.0123456789ab.woff2"
+        )
+    }
+
+    assert "src: url(icons.0123456789ab.woff2) format('woff2');" in rewrite_font_urls(
+        css, filenames
+    )
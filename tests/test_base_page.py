@@ -0,0 +1,93 @@
+import zlib
+from typing import Optional
+
+import pytest
+from dominate.tags import div, ul
+from dominate.util import raw
+
+from src.assets import ASSETS, FONTS_CSS_URLS
+from src.components.base_page import STREAM_SLOT, BasePage, StreamSlot, render_shell
+
+
+def test_base_page_wraps_content_in_shared_shell():
+    render_shell.cache_clear()
+
+    rooms = BasePage(div("Salon", id="room"), title="Rooms").render()
+    bulbs = BasePage(div("Lamp"), title="Rooms").render()
+
+    assert rooms.startswith("<!DOCTYPE html>")
+    assert "<title>Rooms</title>" in rooms
+    assert '<body hx-boost="true" hx-ext="head-support">' in rooms
+    assert '<div id="room">Salon</div>' in rooms
+    assert rooms.endswith("</body>\n</html>")
+    assert "<div>Lamp</div>" in bulbs
+    assert render_shell.cache_info().misses == 1
+
+
+def test_base_page_links_vendored_fonts(monkeypatch):
+    render_shell.cache_clear()
+    monkeypatch.setattr(ASSETS, "_assets", {"fonts.css": "fonts.0123456789ab.css"})
+
+    shell = render_shell("Rooms")[0]
+    render_shell.cache_clear()
+
+    assert '<link href="/public/fonts.0123456789ab.css" rel="stylesheet">' in shell
+    assert not any(url in shell for url in FONTS_CSS_URLS)
+
+
+class FakeResponse:
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.ended = False
+
+    async def send(self, data: bytes) -> None:
+        self.chunks.append(data)
+
+    async def eof(self) -> None:
+        self.ended = True
+
+
+class FakeRequest:
+    def __init__(self, headers: Optional[dict[str, str]] = None) -> None:
+        self.headers = headers or {}
+        self.response = FakeResponse()
+
+    async def respond(self, **kwargs) -> FakeResponse:
+        return self.response
+
+
+@pytest.mark.asyncio
+async def test_base_page_streams_fragments_into_slot():
+    async def fragments():
+        yield "<li>Salon</li>"
+        yield "<li>Kuchnia</li>"
+
+    page = BasePage(div("Nav"), ul(StreamSlot()), title="Rooms")
+    request = FakeRequest()
+    await page.stream(request, fragments())
+
+    chunks = [chunk.decode() for chunk in request.response.chunks]
+    assert chunks[0] == render_shell("Rooms")[0]
+    assert chunks[2:4] == ["<li>Salon</li>", "<li>Kuchnia</li>"]
+    assert STREAM_SLOT not in "".join(chunks)
+    assert "".join(chunks).endswith("</ul>\n  </body>\n</html>")
+    assert request.response.ended
+
+
+@pytest.mark.asyncio
+async def test_base_page_streams_gzip_chunks_that_decode_on_their_own():
+    async def fragments():
+        yield "<li>Salon</li>"
+
+    page = BasePage(ul(StreamSlot()), title="Rooms")
+    request = FakeRequest({"accept-encoding": "gzip, deflate"})
+    await page.stream(request, fragments())
+
+    decompressor = zlib.decompressobj(31)
+    decoded = [
+        decompressor.decompress(chunk).decode() for chunk in request.response.chunks
+    ]
+    assert decoded[2] == "<li>Salon</li>"
+    assert (
+        "".join(decoded) == BasePage(ul(raw("<li>Salon</li>")), title="Rooms").render()
+    )
@@ -0,0 +1,40 @@
+import time
+
+from src.bulb_health import BulbHealth
+
+
+def test_bulb_health_opens_after_consecutive_failures(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    health = BulbHealth(failure_threshold=3, cooldown=5, max_cooldown=60)
+
+    for _ in range(2):
+        health.record_failure("192.168.0.10")
+    assert health.allow_request("192.168.0.10")
+
+    health.record_failure("192.168.0.10")
+    assert health.is_offline("192.168.0.10")
+    assert not health.allow_request("192.168.0.10")
+    assert health.allow_request("192.168.0.11")
+
+
+def test_bulb_health_probes_once_per_cooldown(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    health = BulbHealth(failure_threshold=1, cooldown=5, max_cooldown=60)
+    health.record_failure("192.168.0.10")
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 5)
+    assert health.allow_request("192.168.0.10")
+    assert not health.allow_request("192.168.0.10")
+
+    # A failed probe doubles the cooldown
+    health.record_failure("192.168.0.10")
+    monkeypatch.setattr(time, "monotonic", lambda: now + 14)
+    assert not health.allow_request("192.168.0.10")
+    monkeypatch.setattr(time, "monotonic", lambda: now + 15)
+    assert health.allow_request("192.168.0.10")
+
+    health.record_success("192.168.0.10")
+    assert not health.is_offline("192.168.0.10")
+    assert health.allow_request("192.168.0.10")
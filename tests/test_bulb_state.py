@@ -0,0 +1,55 @@
+import time
+
+from src.bulb_state import BulbStateStore
+from src.wiz import BulbParameters, WizGetResult
+
+
+def test_bulb_state_store_serves_fresh_entries_only(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    store = BulbStateStore(ttl=1.5)
+    result = WizGetResult(state=True, dimming=50)
+
+    store.set("192.168.0.10", result)
+    assert store.get("192.168.0.10") is result
+    assert store.get("192.168.0.11") is None
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert store.get("192.168.0.10") is None
+
+
+def test_bulb_state_store_invalidate():
+    store = BulbStateStore(ttl=60)
+    store.set("192.168.0.10", WizGetResult(state=False))
+
+    store.invalidate("192.168.0.10")
+    assert store.get("192.168.0.10") is None
+
+
+def test_bulb_state_store_merge_applies_sent_parameters():
+    store = BulbStateStore(ttl=60)
+    assert store.merge("192.168.0.10", BulbParameters(state=True)) is None
+
+    store.set(
+        "192.168.0.10", WizGetResult(state=False, sceneId=11, dimming=40, temp=2700)
+    )
+    merged = store.merge(
+        "192.168.0.10", BulbParameters(state=True, red=255, green=0, blue=10)
+    )
+
+    assert (merged.state, merged.r, merged.g, merged.b) == (True, 255, 0, 10)
+    assert (merged.temp, merged.sceneId, merged.dimming) == (None, 0, 40)
+    assert store.get("192.168.0.10") is merged
+
+
+def test_bulb_state_store_notifies_state_changes_only():
+    store = BulbStateStore(ttl=60)
+    changes = []
+    store.subscribe(lambda ip, result: changes.append(result))
+
+    store.set("192.168.0.10", WizGetResult(state=True, dimming=50, rssi=-56))
+    store.set("192.168.0.10", WizGetResult(state=True, dimming=50, rssi=-70, src="udp"))
+    store.set("192.168.0.10", WizGetResult(state=True, dimming=60, rssi=-62))
+    store.set("192.168.0.10", None)
+
+    assert [result and result.dimming for result in changes] == [50, 60, None]
@@ -0,0 +1,41 @@
+import pytest
+from pydantic import ValidationError
+
+from src.views.commands.commands import BULK_COMMANDS
+
+
+def test_bulk_commands_validate_params_once():
+    commands = BULK_COMMANDS.validate_json(
+        b'[{"room_ids": [1], "params": {"state": true, "brightness": 40}},'
+        b' {"bulb_ids": [3, 4], "params": {"state": false}}]'
+    )
+
+    assert [command.room_ids for command in commands] == [[1], []]
+    assert commands[0].params.dimming == 40
+    assert commands[1].params.state is False
+
+
+def test_bulk_commands_accept_bulb_wire_names():
+    (command,) = BULK_COMMANDS.validate_json(
+        b'[{"bulb_ids": [1],'
+        b' "params": {"state": true, "dimming": 40, "temp": 3000, "r": 255}}]'
+    )
+
+    assert command.params.dimming == 40
+    assert command.params.temp == 3000
+    assert command.params.r == 255
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'[{"params": {"state": true}}]',
+        b'[{"bulb_ids": [1], "params": {"state": true, "brightness": 500}}]',
+        b'{"bulb_ids": [1], "params": {"state": true}}',
+        b'[{"bulb_ids": [1], "params": {"state": true, "room_id": 4}}]',
+        b'[{"bulb_ids": [1], "room": 1, "params": {"state": true}}]',
+    ],
+)
+def test_bulk_commands_reject_invalid_commands(body: bytes):
+    with pytest.raises(ValidationError):
+        BULK_COMMANDS.validate_json(body)
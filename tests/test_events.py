@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from src.bulb_state import BULB_STATE
+from src.components.bulb_icon import BulbIcon
+from src.components.room_brightness_slider import RoomBrightnessSlider
+from src.components.room_light_switch import RoomLightSwitch
+from src.models.bulb import Bulb
+from src.models.room import Room
+import src.views.events.events
+from src.views.events.events import format_event, render_state_events
+from src.wiz import WizGetResult
+
+
+def test_format_event_prefixes_every_line():
+    content = '<button id="x">\n  <p>Lamp</p>\n</button>'
+
+    assert format_event("bulb-1", content) == (
+        'event: bulb-1\ndata: <button id="x">\ndata:   <p>Lamp</p>\ndata: </button>\n\n'
+    )
+
+
+@pytest.mark.asyncio
+async def test_render_state_events_covers_changed_bulbs_and_their_rooms(db, app):
+    salon = await Room.create(name="Salon")
+    kitchen = await Room.create(name="Kuchnia")
+    lamp = await Bulb.create(name="Lamp", ip="192.168.0.10", room=salon)
+    await Bulb.create(name="Spot", ip="192.168.0.11", room=kitchen)
+    for ip in ("192.168.0.10", "192.168.0.11"):
+        BULB_STATE.set(ip, WizGetResult(state=True, dimming=50))
+
+    events = await render_state_events(app, {"192.168.0.10"})
+
+    event_names = [
+        line.removeprefix("event: ")
+        for line in events.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert event_names == [
+        BulbIcon.get_event_name(lamp),
+        RoomLightSwitch.get_event_name(salon),
+        RoomBrightnessSlider.get_event_name(salon),
+    ]
+    assert "<p>Lamp</p>" in events
+
+
+class FakeStreamResponse:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    async def send(self, data: str) -> None:
+        self.sent.append(data)
+
+
+class FakeRequest:
+    def __init__(self) -> None:
+        self.response = FakeStreamResponse()
+
+    async def respond(self, **kwargs) -> FakeStreamResponse:
+        return self.response
+
+
+@pytest.mark.asyncio
+async def test_bulb_state_events_unsubscribes_when_stream_closes(db, app):
+    handler = app.router.find_route_by_view_name("bulb_state_events").handler
+    listeners = len(BULB_STATE._listeners)
+
+    stream = asyncio.create_task(handler(FakeRequest()))
+    await asyncio.sleep(0)
+    assert len(BULB_STATE._listeners) == listeners + 1
+
+    # Sanic cancels the handler when the client goes away
+    stream.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await stream
+    assert len(BULB_STATE._listeners) == listeners
+
+
+@pytest.mark.asyncio
+async def test_bulb_state_events_skip_unchanged_states_and_survive_errors(
+    db, app, monkeypatch
+):
+    salon = await Room.create(name="Salon")
+    lamp = await Bulb.create(name="Lamp", ip="192.168.0.10", room=salon)
+    BULB_STATE.set("192.168.0.10", WizGetResult(state=True, dimming=50, rssi=-56))
+    handler = app.router.find_route_by_view_name("bulb_state_events").handler
+    request = FakeRequest()
+    stream = asyncio.create_task(handler(request))
+    await asyncio.sleep(0)
+
+    async def broken_render_state_events(app, ips):
+        monkeypatch.undo()
+        raise ValueError("getPilot reply without a result")
+
+    # Only the signal strength changed
+    BULB_STATE.set("192.168.0.10", WizGetResult(state=True, dimming=50, rssi=-70))
+    await asyncio.sleep(0.1)
+    monkeypatch.setattr(
+        src.views.events.events, "render_state_events", broken_render_state_events
+    )
+    BULB_STATE.set("192.168.0.10", WizGetResult(state=True, dimming=60, rssi=-70))
+    await asyncio.sleep(0.1)
+    BULB_STATE.set("192.168.0.10", WizGetResult(state=False, dimming=60, rssi=-70))
+    await asyncio.sleep(0.1)
+    stream.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await stream
+
+    assert len(request.response.sent) == 1
+    assert request.response.sent[0].startswith(
+        f"event: {BulbIcon.get_event_name(lamp)}\n"
+    )
+    assert ">light_off</span>" in request.response.sent[0]
@@ -0,0 +1,125 @@
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+
+from src.fanout import DEFAULT_ACCESS_POINT, FanOutScheduler, LatestCommandQueue
+
+
+@dataclass
+class FakeBulb:
+    ip: str
+
+
+def test_fan_out_groups_bulbs_by_access_point():
+    scheduler = FanOutScheduler(
+        max_concurrency=8,
+        max_concurrency_per_access_point=4,
+        packet_interval=0,
+        access_points={"hall": ["192.168.1.0/25"], "garden": ["192.168.1.128/25"]},
+    )
+
+    assert scheduler.get_access_point("192.168.1.10") == "hall"
+    assert scheduler.get_access_point("192.168.1.200") == "garden"
+    assert scheduler.get_access_point("10.0.0.1") == DEFAULT_ACCESS_POINT
+
+
+@pytest.mark.asyncio
+async def test_single_calls_share_the_caps_of_bulk_commands():
+    scheduler = FanOutScheduler(
+        max_concurrency=8, max_concurrency_per_access_point=2, packet_interval=0
+    )
+    in_flight = 0
+    peak = 0
+
+    async def send(bulb: FakeBulb) -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    bulbs = [FakeBulb(f"192.168.1.{n}") for n in range(10, 16)]
+    # Poller reads and a bulk command at the same time
+    await asyncio.gather(
+        *[scheduler.call(bulb, send) for bulb in bulbs],
+        scheduler.run(bulbs, send),
+    )
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_fan_out_caps_concurrency_per_access_point():
+    scheduler = FanOutScheduler(
+        max_concurrency=3,
+        max_concurrency_per_access_point=2,
+        packet_interval=0,
+        access_points={"hall": ["192.168.1.0/25"], "garden": ["192.168.1.128/25"]},
+    )
+    in_flight: dict[str, int] = {"hall": 0, "garden": 0}
+    peaks: dict[str, int] = {"hall": 0, "garden": 0}
+    peak_total = 0
+
+    async def send(bulb: FakeBulb) -> None:
+        nonlocal peak_total
+        access_point = scheduler.get_access_point(bulb.ip)
+        in_flight[access_point] += 1
+        peaks[access_point] = max(peaks[access_point], in_flight[access_point])
+        peak_total = max(peak_total, sum(in_flight.values()))
+        await asyncio.sleep(0.01)
+        in_flight[access_point] -= 1
+        if bulb.ip.endswith(".13"):
+            raise ConnectionError
+
+    bulbs = [FakeBulb(f"192.168.1.{n}") for n in range(10, 20)] + [
+        FakeBulb(f"192.168.1.{n}") for n in range(200, 210)
+    ]
+    results = await scheduler.run(bulbs, send)
+
+    assert peaks == {"hall": 2, "garden": 2}
+    assert peak_total == 3
+    assert [type(result) for result in results if result] == [ConnectionError]
+    assert scheduler.last_stats.commands == 20
+    assert scheduler.last_stats.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_fan_out_paces_datagrams_through_one_access_point():
+    scheduler = FanOutScheduler(
+        max_concurrency=16, max_concurrency_per_access_point=16, packet_interval=0.02
+    )
+    sent_at = []
+
+    async def send(bulb: FakeBulb) -> None:
+        sent_at.append(asyncio.get_running_loop().time())
+
+    await scheduler.run([FakeBulb(f"10.0.0.{n}") for n in range(5)], send)
+
+    gaps = [later - earlier for earlier, later in zip(sent_at, sent_at[1:])]
+    assert all(gap >= 0.015 for gap in gaps)
+
+
+@pytest.mark.asyncio
+async def test_latest_command_queue_drops_superseded_commands():
+    queue = LatestCommandQueue()
+    sent = []
+    first_sent = asyncio.Event()
+
+    def command(brightness: int):
+        async def send() -> None:
+            sent.append(brightness)
+            first_sent.set()
+            await asyncio.sleep(0.01)
+
+        return send
+
+    first = asyncio.create_task(queue.submit("192.168.0.10", command(10)))
+    await first_sent.wait()
+    results = await asyncio.gather(
+        first,
+        *[queue.submit("192.168.0.10", command(value)) for value in (20, 30, 40)],
+    )
+
+    assert sent == [10, 40]
+    assert results == [True, False, False, True]
@@ -0,0 +1,41 @@
+from dominate.tags import span
+
+from src.components.fragment_cache import FragmentCache
+
+
+def test_fragment_cache_renders_each_state_once():
+    cache = FragmentCache(maxsize=2)
+    builds = []
+
+    def build(text: str):
+        def _build():
+            builds.append(text)
+            return span(text)
+
+        return _build
+
+    assert cache.render("Label", 1, ("on",), build("on")) == "<span>on</span>"
+    assert cache.render("Label", 1, ("on",), build("on")) == "<span>on</span>"
+    assert cache.render("Label", 1, ("off",), build("off")) == "<span>off</span>"
+    assert builds == ["on", "off"]
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(maxsize=2)
+    builds = []
+
+    def build(entity_id: int):
+        def _build():
+            builds.append(entity_id)
+            return span(str(entity_id))
+
+        return _build
+
+    cache.render("Label", 1, None, build(1))
+    cache.render("Label", 2, None, build(2))
+    cache.render("Label", 1, None, build(1))
+    cache.render("Label", 3, None, build(3))
+    cache.render("Label", 1, None, build(1))
+    cache.render("Label", 2, None, build(2))
+
+    assert builds == [1, 2, 3, 2]
@@ -0,0 +1,19 @@
+import logging
+import random
+
+from src.logger import DebugSamplingFilter
+
+
+def make_record(level: int) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, "message", None, None)
+
+
+def test_debug_sampling_filter_samples_debug_records_only(monkeypatch):
+    sampling_filter = DebugSamplingFilter(rate=0.1)
+
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    assert not sampling_filter.filter(make_record(logging.DEBUG))
+    assert sampling_filter.filter(make_record(logging.INFO))
+
+    monkeypatch.setattr(random, "random", lambda: 0.05)
+    assert sampling_filter.filter(make_record(logging.DEBUG))
@@ -0,0 +1,56 @@
+import gzip
+from types import SimpleNamespace
+
+from sanic import HTTPResponse
+
+from src.middleware import (
+    add_vary,
+    compress,
+    get_encoding,
+    get_etag,
+    is_compressible,
+    matches_etag,
+)
+
+
+def make_request(**headers: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        headers={name.replace("_", "-"): value for name, value in headers.items()}
+    )
+
+
+def test_matches_etag_uses_weak_comparison():
+    etag = get_etag(b"<span>on</span>")
+
+    assert etag == get_etag(b"<span>on</span>")
+    assert etag != get_etag(b"<span>off</span>")
+    assert matches_etag(make_request(if_none_match=etag), etag)
+    assert matches_etag(make_request(if_none_match=f'"x", {etag[2:]}'), etag)
+    assert matches_etag(make_request(if_none_match="*"), etag)
+    assert not matches_etag(make_request(if_none_match='"x"'), etag)
+    assert not matches_etag(make_request(), etag)
+
+
+def test_get_encoding_skips_refused_encodings():
+    assert get_encoding(make_request(accept_encoding="gzip, deflate")) == "gzip"
+    assert get_encoding(make_request(accept_encoding="gzip;q=0, deflate")) is None
+    assert get_encoding(make_request()) is None
+
+
+def test_only_large_text_responses_are_compressed():
+    page = HTTPResponse(b"<p>Salon</p>" * 200, content_type="text/html")
+    fragment = HTTPResponse(b"<p>Salon</p>", content_type="text/html")
+    image = HTTPResponse(b"\x89PNG" * 1000, content_type="image/png")
+
+    assert is_compressible(page)
+    assert not is_compressible(fragment)
+    assert not is_compressible(image)
+    assert gzip.decompress(compress(page.body, "gzip")) == page.body
+
+
+def test_add_vary_keeps_existing_headers():
+    response = HTTPResponse(headers={"Vary": "HX-Request"})
+    add_vary(response, "Accept-Encoding")
+    add_vary(response, "Accept-Encoding")
+
+    assert response.headers["vary"] == "HX-Request, Accept-Encoding"
@@ -0,0 +1,31 @@
+from src.models.bulb import Bulb
+from src.models.helpers import describe_fields
+from src.models.room import Room
+
+
+def test_model_fields_are_described_once(monkeypatch):
+    describe_fields.cache_clear()
+    calls = []
+    describe = Bulb.describe.__func__
+
+    def counting_describe(cls, *args, **kwargs):
+        calls.append(cls)
+        return describe(cls, *args, **kwargs)
+
+    monkeypatch.setattr(Bulb, "describe", classmethod(counting_describe))
+
+    Bulb.get_name_form_validators()
+    Bulb.get_ip_address_validators()
+    assert Bulb.get_bulb_fields()["ip"]["constraints"]["max_length"] == 15
+    assert calls == [Bulb]
+
+    describe_fields.cache_clear()
+    Bulb.get_bulb_fields()
+    assert calls == [Bulb, Bulb]
+
+
+def test_model_fields_are_cached_per_model():
+    describe_fields.cache_clear()
+
+    assert "ip" in Bulb.get_bulb_fields()
+    assert "ip" not in Room.get_room_fields()
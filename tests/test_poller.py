@@ -0,0 +1,74 @@
+import pytest
+
+import src.poller
+from src.bulb_state import BulbStateStore
+from src.poller import BulbPoller, PollSchedule
+from src.wiz import WizGetResult, parse_bulb_response_data
+
+
+@pytest.mark.asyncio
+async def test_bulb_poller_backs_off_idle_and_offline_bulbs(monkeypatch):
+    responses = {
+        "192.168.0.10": (None, WizGetResult(state=True, dimming=50)),
+        "192.168.0.11": ("Bulb offline", None),
+    }
+    signal_strengths = iter(range(-50, -90, -1))
+
+    async def send_message_to_wiz(ip, _message):
+        error, result = responses[ip]
+        if result is None:
+            return error, result
+        # The signal strength changes from poll to poll, the state doesn't
+        return error, result.model_copy(update={"rssi": next(signal_strengths)})
+
+    monkeypatch.setattr(src.poller, "send_message_to_wiz", send_message_to_wiz)
+    store = BulbStateStore(ttl=1)
+    poller = BulbPoller(
+        store,
+        min_interval=2,
+        max_interval=8,
+        offline_max_interval=16,
+        bulbs_refresh_interval=60,
+    )
+    poller._schedules = {
+        ip: PollSchedule(ip=ip, interval=2, next_poll_at=0) for ip in responses
+    }
+
+    for _ in range(4):
+        for ip in responses:
+            await poller._poll(ip)
+
+    assert poller._schedules["192.168.0.10"].interval == 8
+    assert poller._schedules["192.168.0.11"].interval == 16
+    assert store.get_entry("192.168.0.10").result.dimming == 50
+    assert store.get_entry("192.168.0.11").result is None
+
+    poller.touch("192.168.0.11")
+    assert poller._schedules["192.168.0.11"].interval == 2
+
+
+@pytest.mark.asyncio
+async def test_bulb_poller_treats_error_reply_as_offline(monkeypatch):
+    async def send_message_to_wiz(ip, _message):
+        return parse_bulb_response_data(
+            {"method": "getPilot", "error": {"code": -32600, "message": "Bad"}},
+            wiz_message_method="getPilot",
+        )
+
+    monkeypatch.setattr(src.poller, "send_message_to_wiz", send_message_to_wiz)
+    store = BulbStateStore(ttl=1)
+    poller = BulbPoller(
+        store,
+        min_interval=2,
+        max_interval=8,
+        offline_max_interval=16,
+        bulbs_refresh_interval=60,
+    )
+    poller._schedules = {
+        "192.168.0.10": PollSchedule(ip="192.168.0.10", interval=2, next_poll_at=0)
+    }
+
+    await poller._poll("192.168.0.10")
+
+    assert poller._schedules["192.168.0.10"].interval == 4
+    assert store.get_entry("192.168.0.10").result is None
@@ -0,0 +1,33 @@
+import pytest
+from tortoise.exceptions import DoesNotExist
+
+from src.models.bulb import Bulb
+from src.models.room import Room
+from src.registry import Registry
+
+
+@pytest.mark.asyncio
+async def test_registry_resolves_bulbs_and_rooms(db):
+    room = await Room.create(name="Salon")
+    lamp = await Bulb.create(name="Lamp", ip="192.168.0.10", room=room)
+    spare = await Bulb.create(name="Spare", ip="192.168.0.11")
+    registry = Registry()
+
+    assert [bulb.id for bulb in await registry.get_room_bulbs([room.id])] == [lamp.id]
+    assert {bulb.id for bulb in await registry.get_bulbs()} == {lamp.id, spare.id}
+    assert (await registry.get_bulbs_by_ip(["192.168.0.11"]))[0].id == spare.id
+    assert (await registry.get_room(room.id)).name == "Salon"
+    with pytest.raises(DoesNotExist):
+        await registry.get_bulb(999)
+
+
+@pytest.mark.asyncio
+async def test_registry_reloads_after_invalidate(db):
+    registry = Registry()
+    assert await registry.get_bulbs() == []
+
+    await Bulb.create(name="Lamp", ip="192.168.0.10")
+    assert await registry.get_bulbs() == []
+
+    registry.invalidate()
+    assert [bulb.name for bulb in await registry.get_bulbs()] == ["Lamp"]
@@ -0,0 +1,87 @@
+import asyncio
+import re
+
+import pytest
+from sanic.exceptions import NotFound
+
+from src.bulb_state import BULB_STATE
+from src.components.bulb_icon import BulbIcon
+from src.components.room_brightness_slider import RoomBrightnessSlider
+from src.components.room_light_switch import RoomLightSwitch
+from src.fanout import FAN_OUT
+from src.models.bulb import Bulb
+from src.models.room import Room
+from src.wiz import WizGetResult
+
+
+@pytest.mark.asyncio
+async def test_rooms_snapshot_swaps_every_placeholder_out_of_band(db, app):
+    salon = await Room.create(name="Salon")
+    kitchen = await Room.create(name="Kuchnia")
+    lamp = await Bulb.create(name="Lamp", ip="192.168.0.10", room=salon)
+    spot = await Bulb.create(name="Spot", ip="192.168.0.11", room=kitchen)
+    BULB_STATE.set("192.168.0.10", WizGetResult(state=True, dimming=50))
+    BULB_STATE.set("192.168.0.11", WizGetResult(state=False, dimming=10))
+    handler = app.router.find_route_by_view_name("rooms_snapshot").handler
+
+    response = await handler(None)
+
+    body = response.body.decode()
+    swapped_ids = re.findall(r'<div id="([^"]+)" hx-swap-oob="innerHTML">', body)
+    assert swapped_ids == [
+        BulbIcon.get_event_name(lamp),
+        BulbIcon.get_event_name(spot),
+        RoomLightSwitch.get_event_name(salon),
+        RoomBrightnessSlider.get_event_name(salon),
+        RoomLightSwitch.get_event_name(kitchen),
+        RoomBrightnessSlider.get_event_name(kitchen),
+    ]
+    # Each placeholder gets the rendered state of its bulb
+    lamp_icon = body.split(f'<div id="{BulbIcon.get_event_name(lamp)}"')[1]
+    spot_icon = body.split(f'<div id="{BulbIcon.get_event_name(spot)}"')[1]
+    assert lamp_icon.startswith(' hx-swap-oob="innerHTML"><button')
+    assert ">lightbulb</span><p>Lamp</p></button></div>" in lamp_icon
+    assert ">light_off</span><p>Spot</p></button></div>" in spot_icon
+
+
+@pytest.mark.asyncio
+async def test_room_snapshot_covers_one_room(db, app):
+    salon = await Room.create(name="Salon")
+    await Room.create(name="Kuchnia")
+    lamp = await Bulb.create(name="Lamp", ip="192.168.0.10", room=salon)
+    BULB_STATE.set("192.168.0.10", WizGetResult(state=True, dimming=50))
+    handler = app.router.find_route_by_view_name("room_snapshot").handler
+
+    response = await handler(None, id=salon.id)
+
+    swapped_ids = re.findall(r'<div id="([^"]+)" hx-swap-oob', response.body.decode())
+    assert swapped_ids == [
+        BulbIcon.get_event_name(lamp),
+        RoomLightSwitch.get_event_name(salon),
+        RoomBrightnessSlider.get_event_name(salon),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_room_snapshot_of_unknown_room_is_not_found(db, app):
+    handler = app.router.find_route_by_view_name("room_snapshot").handler
+
+    with pytest.raises(NotFound):
+        await handler(None, id=999)
+
+
+@pytest.mark.asyncio
+async def test_cached_bulb_states_are_read_without_fan_out_pacing(db, monkeypatch):
+    monkeypatch.setattr(FAN_OUT, "packet_interval", 0.05)
+    salon = await Room.create(name="Salon")
+    for n in range(10, 20):
+        await Bulb.create(name=f"Lamp {n}", ip=f"192.168.0.{n}", room=salon)
+        BULB_STATE.set(f"192.168.0.{n}", WizGetResult(state=True, dimming=50))
+    await salon.fetch_related("bulbs")
+    event_loop = asyncio.get_running_loop()
+
+    started_at = event_loop.time()
+    await salon.assign_bulbs_wiz_info()
+
+    assert event_loop.time() - started_at < 0.05
+    assert all(bulb.wiz_info.state for bulb in salon.bulbs)
@@ -0,0 +1,31 @@
+from pydantic_core import Url
+
+from src.settings import Settings
+
+
+def test_get_db_url_adds_sqlite_pragmas():
+    settings = Settings(
+        env="test",
+        db_url=Url("sqlite://data/db.sql?synchronous=FULL"),
+        sqlite_pragmas={"journal_mode": "WAL", "synchronous": "NORMAL"},
+    )
+
+    assert settings.get_db_url() == (
+        "sqlite://data/db.sql?journal_mode=WAL&synchronous=FULL"
+    )
+
+
+def test_get_db_url_without_pragmas():
+    settings = Settings(env="test", sqlite_pragmas={})
+
+    assert settings.get_db_url() == "sqlite://db.sql"
+
+
+def test_get_db_url_keeps_absolute_sqlite_path():
+    settings = Settings(
+        env="test",
+        db_url=Url("sqlite:///var/lib/app/db.sql"),
+        sqlite_pragmas={"journal_mode": "WAL"},
+    )
+
+    assert settings.get_db_url() == "sqlite:///var/lib/app/db.sql?journal_mode=WAL"
@@ -7,7 +7,22 @@ from typing import Type, Any
 
 import pytest
 
-from src.wiz import WizMessage, send_message_to_wiz
+from benchmarks.wiz_parser import RECORDED_GET_PILOT_RESPONSES
+from src.bulb_health import BULB_HEALTH
+from src.wiz import (
+    INVALID_RESPONSE_ERROR_MESSAGE,
+    MESSAGES,
+    RetryPolicy,
+    WizError,
+    WizGetResult,
+    WizMessage,
+    broadcast_message_to_wiz,
+    get_brightness_message,
+    get_wiz_protocol,
+    parse_bulb_response_data,
+    parse_get_result,
+    send_message_to_wiz,
+)
 
 
 class UDPServer:
@@ -28,6 +43,15 @@ class UDPServer:
         self._transport.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_bulb_health():
+    # Test servers share 127.0.0.1, timeouts in one test must not open the
+    # circuit for the next
+    BULB_HEALTH.reset()
+    yield
+    BULB_HEALTH.reset()
+
+
 def get_unused_udp_port() -> int:
     with contextlib.closing(socket.socket(type=socket.SOCK_DGRAM)) as sock:
         sock.bind(("127.0.0.1", 0))
@@ -57,3 +81,309 @@ async def test_send_message_to_wiz(
         message = WizMessage(method="getPilot")
         res = await send_message_to_wiz(host, message, port)
         assert res is None
+
+
+def get_pilot_response(mac: str) -> dict[str, Any]:
+    return {
+        "method": "getPilot",
+        "env": "pro",
+        "result": {"mac": mac, "rssi": -60, "state": True, "sceneId": 0, "dimming": 50},
+    }
+
+
+@pytest.mark.asyncio
+async def test_send_message_to_wiz_shares_one_endpoint():
+    class ServerProtocol(DatagramProtocol):
+        def __init__(self, mac: str) -> None:
+            self.mac = mac
+
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            response = get_pilot_response(self.mac)
+            self.transport.sendto(json.dumps(response).encode(), addr)
+
+    host = "127.0.0.1"
+    ports = [get_unused_udp_port() for _ in range(2)]
+    servers = [
+        UDPServer(
+            host=host, port=port, protocol=lambda mac=f"mac-{port}": ServerProtocol(mac)
+        )
+        for port in ports
+    ]
+
+    async with servers[0], servers[1]:
+        message = WizMessage(method="getPilot")
+        results = await asyncio.gather(
+            *[send_message_to_wiz(host, message, port) for port in ports * 3]
+        )
+        protocol = await get_wiz_protocol()
+
+    assert [result.mac for _, result in results] == [
+        f"mac-{port}" for port in ports * 3
+    ]
+    assert all(error is None for error, _ in results)
+    assert protocol.pending == {}
+    assert protocol is await get_wiz_protocol()
+
+
+@pytest.mark.asyncio
+async def test_send_message_to_wiz_coalesces_concurrent_reads():
+    received = []
+
+    class ServerProtocol(DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            received.append(data)
+            response = get_pilot_response("a8bb5006033d")
+            self.transport.sendto(json.dumps(response).encode(), addr)
+
+    host = "127.0.0.1"
+    port = get_unused_udp_port()
+
+    async with UDPServer(host=host, port=port, protocol=ServerProtocol):
+        message = WizMessage(method="getPilot")
+        results = await asyncio.gather(
+            *[send_message_to_wiz(host, message, port) for _ in range(5)]
+        )
+        protocol = await get_wiz_protocol()
+
+    assert len(received) == 1
+    assert all(result.mac == "a8bb5006033d" for _, result in results)
+    assert protocol.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_broadcast_message_to_wiz_retries_missing_bulbs():
+    received = {}
+
+    class ServerProtocol(DatagramProtocol):
+        def __init__(self, host: str) -> None:
+            self.host = host
+
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            received.setdefault(self.host, []).append(data)
+            response = {"method": "setPilot", "env": "pro", "result": {"success": True}}
+            self.transport.sendto(json.dumps(response).encode(), addr)
+
+    hosts = ["127.0.0.1", "127.0.0.2"]
+    port = get_unused_udp_port()
+    servers = [
+        UDPServer(host=host, port=port, protocol=lambda host=host: ServerProtocol(host))
+        for host in hosts
+    ]
+
+    async with servers[0], servers[1]:
+        # The first address stands in for the subnet broadcast, the second
+        # bulb doesn't hear it and has to be reached by unicast
+        results = await broadcast_message_to_wiz(
+            hosts, MESSAGES["OFF"], broadcast_address=hosts[0], port=port
+        )
+        protocol = await get_wiz_protocol()
+
+    assert {host: len(datagrams) for host, datagrams in received.items()} == {
+        "127.0.0.1": 1,
+        "127.0.0.2": 1,
+    }
+    assert all(error is None and result.success for error, result in results.values())
+    assert results.keys() == set(hosts)
+    assert protocol.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_send_message_to_wiz_resends_lost_datagrams():
+    received = []
+
+    class LossyServerProtocol(DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            received.append(data)
+            # Drop the first datagram like a busy access point would
+            if len(received) > 1:
+                response = get_pilot_response("a8bb5006033d")
+                self.transport.sendto(json.dumps(response).encode(), addr)
+
+    host = "127.0.0.1"
+    port = get_unused_udp_port()
+    policy = RetryPolicy(intervals=(0.05,), deadline=1, jitter=0)
+
+    async with UDPServer(host=host, port=port, protocol=LossyServerProtocol):
+        started_at = asyncio.get_running_loop().time()
+        error, result = await send_message_to_wiz(
+            host, MESSAGES["INFO"], port, policy=policy
+        )
+        elapsed = asyncio.get_running_loop().time() - started_at
+
+    assert error is None
+    assert result.mac == "a8bb5006033d"
+    assert len(received) == 2
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_late_replies_to_resent_copies_do_not_acknowledge_next_request():
+    received = []
+
+    class SlowServerProtocol(DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            received.append(data)
+            # Every copy of OFF is answered, slower than the resend interval,
+            # and ON is lost
+            if b'"state":false' in data:
+                response = {"method": "setPilot", "result": {"success": True}}
+                asyncio.get_running_loop().call_later(
+                    0.12, self.transport.sendto, json.dumps(response).encode(), addr
+                )
+
+    host = "127.0.0.1"
+    port = get_unused_udp_port()
+    patient_policy = RetryPolicy(intervals=(0.5,), deadline=1, jitter=0)
+    off_policy = RetryPolicy(intervals=(0.05,), deadline=1, jitter=0)
+    on_policy = RetryPolicy(intervals=(0.05,), deadline=0.2, jitter=0)
+
+    async with UDPServer(host=host, port=port, protocol=SlowServerProtocol):
+        # Answered on the first copy, measures the round trip
+        await send_message_to_wiz(host, MESSAGES["OFF"], port, policy=patient_policy)
+        off = await send_message_to_wiz(host, MESSAGES["OFF"], port, policy=off_policy)
+        on = await send_message_to_wiz(host, MESSAGES["ON"], port, policy=on_policy)
+
+    assert off[0] is None
+    assert on == ("Bulb offline", None)
+    assert received.count(MESSAGES["OFF"].to_bytes()) == 4
+
+
+@pytest.mark.asyncio
+async def test_lost_copies_are_not_expected_to_reply_later():
+    received = []
+
+    class FirstDatagramLostProtocol(DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            received.append(data)
+            if len(received) > 1:
+                response = {"method": "setPilot", "result": {"success": True}}
+                self.transport.sendto(json.dumps(response).encode(), addr)
+
+    host = "127.0.0.1"
+    port = get_unused_udp_port()
+    policy = RetryPolicy(intervals=(0.05,), deadline=1, jitter=0)
+
+    async with UDPServer(host=host, port=port, protocol=FirstDatagramLostProtocol):
+        first = await send_message_to_wiz(host, MESSAGES["OFF"], port, policy=policy)
+        assert len(received) == 2
+        for _ in range(3):
+            sent_before = len(received)
+            result = await send_message_to_wiz(
+                host, MESSAGES["OFF"], port, policy=policy
+            )
+            assert result[0] is None
+            assert len(received) == sent_before + 1
+
+    assert first[0] is None
+
+
+@pytest.mark.asyncio
+async def test_send_message_to_wiz_gives_up_at_the_deadline():
+    received = []
+
+    class SilentServerProtocol(DatagramProtocol):
+        def datagram_received(self, data, addr):
+            received.append(data)
+
+    host = "127.0.0.1"
+    port = get_unused_udp_port()
+    policy = RetryPolicy(intervals=(0.05, 0.1), deadline=0.3, jitter=0)
+
+    async with UDPServer(host=host, port=port, protocol=SilentServerProtocol):
+        error, result = await send_message_to_wiz(
+            host, MESSAGES["OFF"], port, policy=policy
+        )
+        protocol = await get_wiz_protocol()
+
+    assert (error, result) == ("Bulb offline", None)
+    # Sent at 0, 0.05, 0.15 and 0.25 seconds
+    assert len(received) == 4
+    assert protocol.pending == {}
+
+
+def test_wiz_message_bytes_are_serialized_once():
+    assert MESSAGES["OFF"].to_bytes() is MESSAGES["OFF"].to_bytes()
+    assert json.loads(MESSAGES["OFF"].to_bytes()) == {
+        "method": "setPilot",
+        "params": {"state": False},
+    }
+
+    message = get_brightness_message(40)
+    assert message is get_brightness_message(40)
+    assert json.loads(message.to_bytes())["params"] == {"dimming": 40, "state": True}
+    assert get_brightness_message(0) is MESSAGES["OFF"]
+
+
+@pytest.mark.parametrize("response", RECORDED_GET_PILOT_RESPONSES)
+def test_parse_get_result_matches_validated_result(response: bytes):
+    result = json.loads(response)["result"]
+    assert parse_get_result(result) == WizGetResult(**result)
+
+
+@pytest.mark.asyncio
+async def test_get_pilot_error_reply_is_returned_as_error():
+    class ErrorServerProtocol(DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            response = {
+                "method": "getPilot",
+                "error": {"code": -32600, "message": "Invalid Request"},
+            }
+            self.transport.sendto(json.dumps(response).encode(), addr)
+
+    host = "127.0.0.1"
+    port = get_unused_udp_port()
+
+    async with UDPServer(host=host, port=port, protocol=ErrorServerProtocol):
+        response = await send_message_to_wiz(host, MESSAGES["INFO"], port)
+
+    assert response == (WizError(code=-32600, message="Invalid Request"), None)
+
+
+def test_unreadable_get_pilot_result_is_returned_as_error():
+    response_data = {"method": "getPilot", "result": {"state": True, "dimming": 5}}
+
+    assert parse_bulb_response_data(response_data, "getPilot") == (
+        INVALID_RESPONSE_ERROR_MESSAGE,
+        None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_socket_bind_fails_every_waiting_caller(monkeypatch):
+    event_loop = asyncio.get_running_loop()
+
+    async def create_datagram_endpoint(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        raise OSError("Address already in use")
+
+    monkeypatch.setattr(
+        event_loop, "create_datagram_endpoint", create_datagram_endpoint
+    )
+
+    results = await asyncio.wait_for(
+        asyncio.gather(get_wiz_protocol(), get_wiz_protocol(), return_exceptions=True),
+        timeout=1,
+    )
+
+    assert [type(result) for result in results] == [OSError, OSError]